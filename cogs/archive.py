@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, time, timedelta, timezone
+
+from discord.ext import commands
+
+from cogs.config import Config as cfg
+from utils import potd_utils, search
+
+Cog = commands.Cog
+
+# New POTDs go up on the sheet when the daily POTD is posted
+RELEASE_TIME = time(10, 0, tzinfo=timezone.utc)
+
+
+# Keeps the POTD archive and curator list fresh in the background, so commands
+# only ever read the latest snapshot and never wait on Google
+class Archive(Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.refresher = None
+
+    async def cog_load(self):
+        potd_utils.set_background_refresh(True)
+        self.refresher = asyncio.create_task(self.refresh_periodically())
+
+    async def cog_unload(self):
+        potd_utils.set_background_refresh(False)
+        if self.refresher is not None:
+            self.refresher.cancel()
+
+    # Seconds until the next refresh: the usual interval, or sooner if the
+    # daily release falls before then
+    def seconds_until_next_refresh(self):
+        now = datetime.now(timezone.utc)
+        release = datetime.combine(now.date(), RELEASE_TIME) + timedelta(
+            seconds=cfg.config["archive_release_refresh_delay"]
+        )
+        if release <= now:
+            release += timedelta(days=1)
+        return min(
+            cfg.config["archive_refresh_interval"], (release - now).total_seconds()
+        )
+
+    async def refresh_periodically(self):
+        while True:
+            try:
+                await potd_utils.refresh_caches()
+                # Build the search indexes here rather than in the first search
+                await search.indexes(potd_utils.archive_snapshot())
+            except Exception:
+                self.bot.logger.exception("Failed to refresh the POTD archive.")
+            await asyncio.sleep(self.seconds_until_next_refresh())
+
+
+async def setup(bot):
+    await bot.add_cog(Archive(bot))
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 from datetime import datetime, timezone
@@ -5,11 +6,17 @@ from datetime import datetime, timezone
 import asqlite
 from aiogoogle import Aiogoogle
 from aiogoogle.auth.creds import ServiceAccountCreds
+from aiogoogle.resource import GoogleAPI
 from discord.ext import commands
 from ruamel import yaml
 
 Cog = commands.Cog
 
+# Local copies of the Google API discovery documents, so that starting the bot
+# does not have to wait on (or fail with) Google
+DISCOVERY_CACHE = "data/{}_{}_discovery.json"
+GOOGLE_APIS = {"sheets": "v4", "drive": "v3"}
+
 
 def timestamp(dt: datetime):
     if dt.tzinfo is None:
@@ -17,6 +24,24 @@ def timestamp(dt: datetime):
     return int((dt - datetime(1970, 1, 1, tzinfo=timezone.utc)).total_seconds())
 
 
+def load_discovery_document(api, version):
+    try:
+        with open(DISCOVERY_CACHE.format(api, version)) as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+
+def save_discovery_document(api, version, document):
+    cache_path = DISCOVERY_CACHE.format(api, version)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # Write to a temporary file first so a crash never leaves a partial cache
+    temporary = cache_path + ".tmp"
+    with open(temporary, "w") as cache_file:
+        json.dump(document, cache_file)
+    os.replace(temporary, cache_path)
+
+
 class Config(Cog):
     config = None
 
@@ -24,16 +49,79 @@ class Config(Cog):
         with open("config/config.yml") as cfgfile:
             Config.config = yaml.safe_load(cfgfile)
         self.bot = bot
+        self.token_refresher = None
+        self.discovery_refresher = None
 
     async def cog_load(self):
-        scopes = ["https://www.googleapis.com/auth/spreadsheets"]
+        scopes = [
+            "https://www.googleapis.com/auth/spreadsheets",
+            # Only used to see when the sheet was last modified
+            "https://www.googleapis.com/auth/drive.metadata.readonly",
+        ]
         secret_file = os.path.join(os.getcwd(), "config/credentials.json")
         service_account_key = json.load(open(secret_file, "r"))
         creds = ServiceAccountCreds(scopes=scopes, **service_account_key)
-        async with Aiogoogle(service_account_creds=creds) as aiogoogle:
-            Config.service = await aiogoogle.discover("sheets", "v4")
-            Config.aiogoogle = aiogoogle
-        Config.spreadsheet = Config.service.spreadsheets
+
+        # One Google client for the whole process. Its session stays open
+        # until the cog is unloaded, so HTTP connections are pooled and the
+        # access token is reused between requests.
+        aiogoogle = Aiogoogle(service_account_creds=creds)
+        await aiogoogle.__aenter__()
+        Config.aiogoogle = aiogoogle
+
+        cached_apis = []
+        for api, version in GOOGLE_APIS.items():
+            cached = load_discovery_document(api, version)
+            if cached is None:
+                await self.discover_api(api, version)
+            else:
+                self.use_api(api, GoogleAPI(cached))
+                cached_apis.append(api)
+        if cached_apis and Config.config["refresh_discovery_document"]:
+            self.discovery_refresher = asyncio.create_task(
+                self.refresh_discovery_documents(cached_apis)
+            )
+
+        self.token_refresher = asyncio.create_task(self.keep_token_fresh())
+
+    async def cog_unload(self):
+        for task in (self.token_refresher, self.discovery_refresher):
+            if task is not None:
+                task.cancel()
+        await Config.aiogoogle.__aexit__(None, None, None)
+
+    def use_api(self, api, service):
+        if api == "sheets":
+            Config.service = service
+            Config.spreadsheet = service.spreadsheets
+        elif api == "drive":
+            Config.drive = service
+
+    async def discover_api(self, api, version):
+        service = await Config.aiogoogle.discover(api, version)
+        self.use_api(api, service)
+        save_discovery_document(api, version, service.discovery_document)
+
+    # Pick up any changes Google has made to the APIs since the cached copies
+    # were saved, without holding up startup
+    async def refresh_discovery_documents(self, apis):
+        for api in apis:
+            try:
+                await self.discover_api(api, GOOGLE_APIS[api])
+            except Exception:
+                self.bot.logger.exception(
+                    "Failed to refresh the {} discovery document.".format(api)
+                )
+
+    # Service account tokens expire after an hour. Renew ours well before then
+    # so that no command has to wait for the token exchange.
+    async def keep_token_fresh(self):
+        while True:
+            try:
+                await Config.aiogoogle.service_account_manager.refresh()
+            except Exception:
+                self.bot.logger.exception("Failed to refresh the Google token.")
+            await asyncio.sleep(Config.config["google_token_refresh_interval"])
 
     @commands.command(
         aliases=["cfl"],
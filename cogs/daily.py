@@ -29,8 +29,8 @@ class Daily(Cog):
         self.dm_list = []
         self.timer = None
 
-        values = await potd_utils.get_potd_values()
-        self.latest_potd = int(values[0][0])
+        archive = potd_utils.archive_snapshot()
+        self.latest_potd = archive.latest if archive is not None else 0
 
         schedule.every().day.at("10:00", "UTC").do(self.schedule_potd).tag("cogs.potd")
 
@@ -51,10 +51,10 @@ class Daily(Cog):
         if self.listening_in_channel != -1:
             self.bot.loop.create_task(self.reset_potd())
 
-    async def prepare_dms(self, potd_row):
+    async def prepare_dms(self, problem):
         def should_dm(x):
             for i in range(4):
-                if (["a", "c", "g", "n"][i] in potd_row[5].lower()) and not (
+                if (["a", "c", "g", "n"][i] in problem.genre_label.lower()) and not (
                     x[1][4 * i] == "x"
                 ):
                     if (
@@ -65,9 +65,8 @@ class Daily(Cog):
                         return True
             return False
 
-        try:
-            d = int(potd_row[cfg.config["potd_sheet_difficulty_col"]])
-        except Exception:
+        d = problem.difficulty
+        if d is None:
             return
 
         async with cfg.pool.acquire() as conn:
@@ -80,43 +79,43 @@ class Daily(Cog):
 
     async def check_potd(self):
         # Get the potds from the sheet (API call)
-        potds = await potd_utils.get_potd_values()
+        archive = await potd_utils.get_archive()
         bot_log = cfg.config["log_channel"]
 
         # Check today's potd
         next = datetime.now()
-        date = next.strftime("%d %b %Y")
-        soon = [(next + timedelta(days=i)).strftime("%d %b %Y") for i in range(1, 4)]
+        date = next.date()
+        soon = [(next + timedelta(days=i)).date() for i in range(1, 4)]
         potd_row = None
         fail = False
         j = 1
-        for potd in potds:
+        for potd in archive:
             j += 1
-            if len(potd) < 2:
+            if potd.date is None:
                 await self.bot.get_channel(cfg.config["log_channel"]).send(
-                    f"Invalid entry at row {j}, potd = {potd}"
+                    f"Invalid entry at row {j}, potd = {potd.id}"
                 )
                 pass
             if passed_current:
                 # Then there has not been a potd on that day.
-                if len(potd) < 8:
+                if not potd.has_content:
                     fail = True
                     await curator_role.edit(mentionable=True)
                     await self.bot.get_channel(cfg.config["log_channel"]).send(
-                        f"There was no potd on {potd[1]}!"
+                        f"There was no potd on {potd.date_label}!"
                     )
                     await curator_role.edit(mentionable=False)
-            if potd[1] == date:
+            if potd.date == date:
                 passed_current = True
                 potd_row = potd
-                if len(potd) < 8 and (mode is None):  # There is no potd.
+                if not potd.has_content and (mode is None):  # There is no potd.
                     fail = True
                     await curator_role.edit(mentionable=True)
                     await self.bot.get_channel(cfg.config["log_channel"]).send(
                         f"There is no potd today!"
                     )
                     await curator_role.edit(mentionable=False)
-                soon.remove(potd[1])
+                soon.remove(potd.date)
         if soon != []:
             await self.bot.get_channel(cfg.config["log_channel"]).send(
                 f"Insufficient rows in the potd sheet! "
@@ -126,8 +125,8 @@ class Daily(Cog):
 
         # Otherwise, everything has passed and we are good to go.
         # Finish up
-        self.requested_number = int(potd_row[0])
-        self.latest_potd = int(potd_row[0])
+        self.requested_number = potd_row.id
+        self.latest_potd = potd_row.id
         await self.prepare_dms(potd_row)
         self.to_send = await potd_utils.generate_source(potd_row, False)
         self.listening_in_channel = cfg.config["potd_channel"]
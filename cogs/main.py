@@ -1,5 +1,5 @@
 import random
-from datetime import datetime, timedelta, timezone
+from datetime import date, timezone
 
 import discord
 from discord import app_commands
@@ -7,7 +7,7 @@ from discord.ext import commands
 from discord.ext.commands import BucketType
 
 from cogs.config import Config as cfg
-from utils import potd_utils
+from utils import potd_utils, render, search
 
 Cog = commands.Cog
 
@@ -17,6 +17,9 @@ class Main(Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    async def cog_load(self):
+        render.prepare_format()
+
     @commands.command(
         aliases=["fetch"],
         brief="Fetch a potd by id.",
@@ -31,19 +34,17 @@ class Main(Cog):
     @commands.command(aliases=["source"], brief="Get the source of a potd by id.")
     @commands.cooldown(1, 5, BucketType.user)
     async def potd_source(self, ctx, number: int):
-        potd_row = await potd_utils.get_potd_row(number)
-        if potd_row is None or len(potd_row) < 8:
-            await ctx.send(f"There is no potd for day {number}. ")
+        problem = await potd_utils.get_problem(number)
+        if problem is None or not problem.has_content:
+            await ctx.send(
+                f"There is no potd for day {number}. {potd_utils.staleness_note()}"
+            )
             return
         else:
-            if datetime.now() - timedelta(hours=10, days=1) > datetime.strptime(
-                potd_row[cfg.config["potd_sheet_date_col"]], "%d %b %Y"
-            ):
-                source = await potd_utils.generate_source(potd_row, True, ctx.author.id)
+            if potd_utils.is_source_revealed(problem):
+                source = await potd_utils.generate_source(problem, True, ctx.author.id)
             else:
-                source = await potd_utils.generate_source(
-                    potd_row, False, ctx.author.id
-                )
+                source = await potd_utils.generate_source(problem, False, ctx.author.id)
             await ctx.send(embed=source)
 
     @commands.command(
@@ -78,15 +79,17 @@ class Main(Cog):
             min(99, diff_upper_bound), diff_lower_bound_filter
         )
 
-        potds = await potd_utils.get_potd_values()
+        archive = await potd_utils.get_archive()
+        solved_potd = set()
+        if search_unsolved:
+            solved_potd = await potd_utils.get_solved_or_read_potds(ctx)
         picked_potd = await potd_utils.pick_potd(
             diff_lower_bound_filter,
             diff_upper_bound_filter,
             genre_filter,
-            potds,
-            [],
-            ctx,
-            search_unsolved,
+            archive,
+            set(),
+            solved_potd,
         )
         if picked_potd is not None:
             # fetch the picked POTDx
@@ -94,32 +97,22 @@ class Main(Cog):
         else:
             await ctx.send(f"No POTD found!")
 
-    async def potds_filtered_by_keywords(self, keyword_list: list[str]):
-        potds = await potd_utils.get_potd_values()
-        filtered_potds = [
-            x
-            for x in potds
-            if len(x) > cfg.config["potd_sheet_statement_col"]
-            and all(
-                keyword.lower() in x[cfg.config["potd_sheet_statement_col"]].lower()
-                for keyword in keyword_list
-            )
-        ]
-        return filtered_potds
+    async def potds_filtered_by_keywords(self, keyword_list: list[str], limit=None):
+        archive = await potd_utils.get_archive()
+        index = await search.keyword_index(archive)
+        return [archive.get(number) for number in index.search(keyword_list, limit)]
 
     async def potd_search_keywords_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> list[app_commands.Choice[str]]:
-        filtered_potds = await self.potds_filtered_by_keywords(current.split())
-        filtered_potd_statements = [
-            potd[cfg.config["potd_sheet_statement_col"]] for potd in filtered_potds
-        ]
         # Only 25 responses are supported in autocomplete, and they must be at
         # most 100 characters
+        filtered_potds = await self.potds_filtered_by_keywords(current.split(), 25)
+        filtered_potd_statements = [problem.statement for problem in filtered_potds]
         return [
             app_commands.Choice(name=statement[:100], value=statement[:100])
             for statement in filtered_potd_statements
-        ][:25]
+        ]
 
     @app_commands.command()
     @app_commands.describe(keywords="Search past potds using these keywords")
@@ -131,15 +124,90 @@ class Main(Cog):
         filtered_potds = await self.potds_filtered_by_keywords(keywords.split())
 
         if filtered_potds:
-            picked_potd_row = random.choice(filtered_potds)
-            image_link = potd_utils.check_for_image_link(picked_potd_row)
+            picked_problem = random.choice(filtered_potds)
+            image_link = potd_utils.check_for_image_link(picked_problem)
             if image_link:
                 await interaction.response.send_message(f"[image]({image_link})")
             else:
-                await potd_utils.texify_potd(picked_potd_row)
+                await potd_utils.texify_potd(picked_problem)
         else:
             await interaction.response.send_message(f"No POTD found!", ephemeral=True)
 
+    @commands.hybrid_command(
+        name="find",
+        brief="Search past POTDs by statement, source and tags.",
+        help="`-find primes`: List the POTDs that best match `primes`.\n"
+        "`-find usamo functional equation`: Words can match the statement, source "
+        "or tags of a POTD.\n",
+    )
+    @app_commands.describe(keywords="Words to look for in past POTDs")
+    @commands.cooldown(1, 10, BucketType.user)
+    async def potd_find(self, ctx, *, keywords: str):
+        await ctx.defer()
+        archive = await potd_utils.get_archive()
+        released = archive.released_ids(date.today())
+        index = await search.ranked_index(archive)
+        results = index.search(
+            keywords.split(),
+            cfg.config["find_results"],
+            released,
+            potd_utils.hidden_source_ids(archive),
+        )
+        if not results:
+            await ctx.send(f"No POTD found!")
+            return
+
+        lines = []
+        for rank, (number, _) in enumerate(results, 1):
+            problem = archive.get(number)
+            preview = " ".join(problem.statement.split())[:80] or "(image)"
+            lines.append(
+                f"**{rank}.** POTD {number} ({problem.date_label}): "
+                f"{discord.utils.escape_markdown(preview)}"
+            )
+        await self.send_pages(ctx, f"POTDs matching {keywords}", lines)
+
+    @commands.command(
+        aliases=["lookup"],
+        brief="Find the POTDs taken from a competition.",
+        help="`-lookup ISL 2019 G3`: Find whether ISL 2019 G3 was a POTD.\n"
+        "`-lookup USAMO 2005`: List the POTDs from USAMO 2005.\n"
+        "`-lookup USA`: List the POTDs from competitions starting with USA.\n",
+    )
+    @commands.cooldown(1, 5, BucketType.user)
+    async def potd_lookup(self, ctx, *, source: str):
+        archive = await potd_utils.get_archive()
+        hidden_sources = potd_utils.hidden_source_ids(archive)
+        index = await search.source_index(archive)
+        matches = [
+            number for _, number in index.lookup(source) if number not in hidden_sources
+        ]
+        if not matches:
+            await ctx.send(f"No POTD found from {source}.")
+            return
+
+        lines = [
+            f"POTD {number}: "
+            f"{discord.utils.escape_markdown(archive.get(number).source)}"
+            for number in matches
+        ]
+        await self.send_pages(ctx, f"POTDs from {source}", lines)
+
+    # Show lines of results ten to a page, through the menu manager
+    async def send_pages(self, ctx, title, lines):
+        pages = []
+        page_count = (len(lines) + 9) // 10
+        for start in range(0, len(lines), 10):
+            embed = discord.Embed(
+                title=title[:256], description="\n".join(lines[start : start + 10])
+            )
+            embed.set_footer(
+                text=f"Page {start // 10 + 1} of {page_count}. "
+                "Use `-fetch <number>` to see a POTD."
+            )
+            pages.append(embed)
+        await self.bot.get_cog("MenuManager").new_menu(ctx, pages)
+
     def parse_genre_input(self, genre):
         complex_genres = genre.split("'")[1::2]
         simple_genres = "".join(genre.split("'")[0::2])
@@ -174,150 +242,82 @@ class Main(Cog):
     @commands.command(aliases=["hint"], brief="Get hint for the POTD.")
     @commands.cooldown(1, 10, BucketType.user)
     async def potd_hint(self, ctx, number: int, hint_number: int = 1):
-        potd_row = await potd_utils.get_potd_row(number)
-        if potd_row is None:
-            await ctx.send(f"There is no potd for day {number}. ")
+        problem = await potd_utils.get_problem(number)
+        if problem is None:
+            await ctx.send(
+                f"There is no potd for day {number}. {potd_utils.staleness_note()}"
+            )
             return
+        elif hint_number not in [1, 2, 3]:
+            await ctx.send("Hint number should be from 1 to 3.")
         else:
-            if hint_number == 1:
-                if (
-                    len(potd_row) <= cfg.config["potd_sheet_hint1_col"]
-                    or potd_row[cfg.config["potd_sheet_hint1_col"]] is None
-                    or potd_row[cfg.config["potd_sheet_hint1_col"]] == ""
-                ):
-                    await ctx.send(f"There is no hint for POTD {number}.")
-                    return
-                else:
-                    await ctx.send(f"Hint for POTD {number}:\n")
-                    await potd_utils.generate_latex(
-                        potd_row[cfg.config["potd_sheet_hint1_col"]], ctx.channel, True
-                    )
-                    if (
-                        len(potd_row) > cfg.config["potd_sheet_hint2_col"]
-                        and potd_row[cfg.config["potd_sheet_hint2_col"]] is not None
-                        and potd_row[cfg.config["potd_sheet_hint2_col"]] != ""
-                    ):
-                        await ctx.send(
-                            f"There is another hint for this POTD. Use `-hint {number} 2` to get the hint."
-                        )
-            elif hint_number == 2:
-                if (
-                    len(potd_row) <= cfg.config["potd_sheet_hint2_col"]
-                    or potd_row[cfg.config["potd_sheet_hint2_col"]] is None
-                    or potd_row[cfg.config["potd_sheet_hint2_col"]] == ""
-                ):
-                    await ctx.send(f"There is no hint 2 for POTD {number}.")
-                    return
-                else:
-                    await ctx.send(f"Hint 2 for POTD {number}:\n")
-                    await potd_utils.generate_latex(
-                        potd_row[cfg.config["potd_sheet_hint2_col"]], ctx.channel, True
-                    )
-                    if (
-                        len(potd_row) > cfg.config["potd_sheet_hint3_col"]
-                        and potd_row[cfg.config["potd_sheet_hint3_col"]] is not None
-                        and potd_row[cfg.config["potd_sheet_hint3_col"]] != ""
-                    ):
-                        await ctx.send(
-                            f"There is another hint for this POTD. Use `-hint {number} 3` to get the hint."
-                        )
-            elif hint_number == 3:
-                if (
-                    len(potd_row) <= cfg.config["potd_sheet_hint3_col"]
-                    or potd_row[cfg.config["potd_sheet_hint3_col"]] is None
-                    or potd_row[cfg.config["potd_sheet_hint3_col"]] == ""
-                ):
-                    await ctx.send(f"There is no hint 3 for POTD {number}.")
-                    return
-                else:
-                    await ctx.send(f"Hint 3 for POTD {number}:\n")
-                    await potd_utils.generate_latex(
-                        potd_row[cfg.config["potd_sheet_hint3_col"]], ctx.channel, True
-                    )
+            hint_name = "hint" if hint_number == 1 else f"hint {hint_number}"
+            hint = problem.hints[hint_number - 1]
+            if hint == "":
+                await ctx.send(f"There is no {hint_name} for POTD {number}.")
+                return
             else:
-                await ctx.send("Hint number should be from 1 to 3.")
+                await ctx.send(f"{hint_name.capitalize()} for POTD {number}:\n")
+                await potd_utils.generate_latex(hint, ctx.channel, True)
+                if hint_number < 3 and problem.hints[hint_number] != "":
+                    await ctx.send(
+                        f"There is another hint for this POTD. Use `-hint {number} {hint_number + 1}` to get the hint."
+                    )
 
     @commands.command(aliases=["answer"], brief="Get answer for the POTD.")
     @commands.cooldown(1, 10, BucketType.user)
     async def potd_answer(self, ctx, number: int):
-        potd_row = await potd_utils.get_potd_row(number)
-        if potd_row is None:
-            await ctx.send(f"There is no potd for day {number}. ")
+        problem = await potd_utils.get_problem(number)
+        if problem is None:
+            await ctx.send(
+                f"There is no potd for day {number}. {potd_utils.staleness_note()}"
+            )
             return
         else:
-            if (
-                len(potd_row) <= cfg.config["potd_sheet_answer_col"]
-                or potd_row[cfg.config["potd_sheet_answer_col"]] is None
-                or potd_row[cfg.config["potd_sheet_answer_col"]] == ""
-            ):
+            if problem.answer == "":
                 await ctx.send(f"There is no answer provided for POTD {number}.")
                 return
             else:
                 await ctx.send(f"Answer for POTD {number}:\n")
-                await potd_utils.generate_latex(
-                    potd_row[cfg.config["potd_sheet_answer_col"]], ctx.channel, True
-                )
+                await potd_utils.generate_latex(problem.answer, ctx.channel, True)
 
     @commands.command(aliases=["discussion"], brief="Get discussion for the POTD.")
     @commands.cooldown(1, 10, BucketType.user)
     async def potd_discussion(self, ctx, number: int):
-        potd_row = await potd_utils.get_potd_row(number)
-        if potd_row is None:
-            await ctx.send(f"There is no potd for day {number}. ")
+        problem = await potd_utils.get_problem(number)
+        if problem is None:
+            await ctx.send(
+                f"There is no potd for day {number}. {potd_utils.staleness_note()}"
+            )
             return
         else:
-            if (
-                len(potd_row) <= cfg.config["potd_sheet_discussion_col"]
-                or potd_row[cfg.config["potd_sheet_discussion_col"]] is None
-                or potd_row[cfg.config["potd_sheet_discussion_col"]] == ""
-            ):
+            if problem.discussion == "":
                 await ctx.send(f"There is no discussion provided for POTD {number}.")
                 return
             else:
                 await ctx.send(f"Discussion for POTD {number}:\n")
-                await potd_utils.generate_latex(
-                    potd_row[cfg.config["potd_sheet_discussion_col"]], ctx.channel, True
-                )
+                await potd_utils.generate_latex(problem.discussion, ctx.channel, True)
 
     @commands.command(aliases=["solution"], brief="Get solution for the POTD.")
     @commands.cooldown(1, 10, BucketType.user)
     async def potd_solution(self, ctx, number: int):
-        potd_row = await potd_utils.get_potd_row(number)
-        if potd_row is None:
-            await ctx.send(f"There is no potd for day {number}. ")
+        problem = await potd_utils.get_problem(number)
+        if problem is None:
+            await ctx.send(
+                f"There is no potd for day {number}. {potd_utils.staleness_note()}"
+            )
             return
         else:
-            if (
-                len(potd_row) <= cfg.config["potd_sheet_solution_col"]
-                or potd_row[cfg.config["potd_sheet_solution_col"]] is None
-                or potd_row[cfg.config["potd_sheet_solution_col"]] == ""
-            ):
-                solution = None
-            else:
-                solution = potd_row[cfg.config["potd_sheet_solution_col"]]
-            if (
-                len(potd_row) <= cfg.config["potd_sheet_solution_link_col"]
-                or potd_row[cfg.config["potd_sheet_solution_link_col"]] is None
-                or potd_row[cfg.config["potd_sheet_solution_link_col"]] == ""
-            ):
-                solution_link = None
-            else:
-                solution_link = potd_row[cfg.config["potd_sheet_solution_link_col"]]
-
-            if solution is None and solution_link is None:
+            if problem.solution == "" and problem.solution_link == "":
                 await ctx.send(f"There is no solution provided for POTD {number}.")
                 return
             else:
-                if solution is not None:
+                if problem.solution != "":
                     await ctx.send(f"Solution for POTD {number}:\n")
-                    await potd_utils.generate_latex(
-                        potd_row[cfg.config["potd_sheet_solution_col"]],
-                        ctx.channel,
-                        True,
-                    )
-                if solution_link is not None:
+                    await potd_utils.generate_latex(problem.solution, ctx.channel, True)
+                if problem.solution_link != "":
                     await ctx.send(
-                        f"Solution Link for POTD {number}:\n{potd_row[cfg.config['potd_sheet_solution_link_col']]}"
+                        f"Solution Link for POTD {number}:\n{problem.solution_link}"
                     )
 
     async def potd_notif_embed(self, ctx, colour):
@@ -12,6 +12,7 @@ from cogs.config import Config as cfg
 Cog = commands.Cog
 
 from utils import potd_utils
+from utils.archive import GENRE_BITS
 
 
 # Commands involving todo/read/solved lists
@@ -34,7 +35,7 @@ class Marking(Cog):
 
         sorted_potds = {"added": [], "already": [], "no_potd": [], "has_discussion": []}
         # Update/add/check status in potd_status table
-        values = await potd_utils.get_potd_values()
+        archive = await potd_utils.get_archive()
         async with cfg.pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 for potd_number in potd_numbers:
@@ -69,29 +70,11 @@ class Marking(Cog):
                             )
                         sorted_potds["added"].append(str(potd_number))
 
-                        potd_row = await potd_utils.get_potd_row(potd_number, values)
-                        if (
-                            potd_row is None
-                            or len(potd_row) <= cfg.config["potd_sheet_statement_col"]
-                        ):
+                        problem = archive.get(potd_number)
+                        if problem is None or not problem.has_content:
                             sorted_potds["no_potd"].append(str(potd_number))
-                        else:
-                            if potd_row is not None:
-                                if (
-                                    len(potd_row)
-                                    > cfg.config["potd_sheet_discussion_col"]
-                                    and potd_row[
-                                        cfg.config["potd_sheet_discussion_col"]
-                                    ]
-                                    is not None
-                                    and potd_row[
-                                        cfg.config["potd_sheet_discussion_col"]
-                                    ]
-                                    != ""
-                                ):
-                                    sorted_potds["has_discussion"].append(
-                                        str(potd_number)
-                                    )
+                        elif problem.discussion != "":
+                            sorted_potds["has_discussion"].append(str(potd_number))
 
         # Send confirm message
         messages = []
@@ -214,16 +197,15 @@ class Marking(Cog):
         solved = await potd_utils.get_potd_status("solved", ctx)
         read = await potd_utils.get_potd_status("read", ctx)
 
-        potd_rows = await potd_utils.get_potd_values()
-        current_potd = int(potd_rows[0][0])
+        archive = await potd_utils.get_archive()
 
         if len(solved) > 0:
             await self.generate_potd_list_output_string(
-                solved, potd_rows, current_potd, flag, "solved", ctx
+                solved, archive, flag, "solved", ctx
             )
         if len(read) > 0:
             await self.generate_potd_list_output_string(
-                read, potd_rows, current_potd, flag, "read", ctx
+                read, archive, flag, "read", ctx
             )
         if len(solved) == 0 and len(read) == 0:
             await ctx.send("Your solved list and read list are empty.")
@@ -239,12 +221,11 @@ class Marking(Cog):
     async def potd_mytodo(self, ctx, flag=None):
         todo = await potd_utils.get_potd_status("todo", ctx)
 
-        potd_rows = await potd_utils.get_potd_values()
-        current_potd = int(potd_rows[0][0])
+        archive = await potd_utils.get_archive()
 
         if len(todo) > 0:
             await self.generate_potd_list_output_string(
-                todo, potd_rows, current_potd, flag, "TODO", ctx, True
+                todo, archive, flag, "TODO", ctx, True
             )
         else:
             await ctx.send("Your TODO list is empty.")
@@ -281,14 +262,12 @@ class Marking(Cog):
         solved_unrated = [x for x in solved if x not in rated]
         read_unrated = [x for x in read if x not in rated]
 
-        potd_rows = await potd_utils.get_potd_values()
-        current_potd = int(potd_rows[0][0])
+        archive = await potd_utils.get_archive()
 
         if len(solved_unrated) > 0:
             await self.generate_potd_list_output_string(
                 solved_unrated,
-                potd_rows,
-                current_potd,
+                archive,
                 flag,
                 "unrated (solved)",
                 ctx,
@@ -296,34 +275,31 @@ class Marking(Cog):
             )
         if len(read_unrated) > 0:
             await self.generate_potd_list_output_string(
-                read_unrated, potd_rows, current_potd, flag, "unrated (read)", ctx, True
+                read_unrated, archive, flag, "unrated (read)", ctx, True
             )
         if len(solved_unrated) == 0 and len(read_unrated) == 0:
             await ctx.send("You have no unrated POTDs.")
 
     # Given a list of POTD numbers, print them by difficulty/subject
     async def generate_potd_list_output_string(
-        self, potd_list, potd_rows, current_potd, flag, adjective, ctx, show_total=True
+        self, potd_list, archive, flag, adjective, ctx, show_total=True
     ):
-        potd_rows = await potd_utils.get_potd_values()
+        def difficulty_of(problem):
+            if problem is None or problem.difficulty_label == "":
+                return "(Unknown)"
+            return problem.difficulty_label
+
+        def difficulty_sort_key(x):
+            return (x.isnumeric(), int(x) if x.isnumeric() else x)
+
         if flag == "d":
             solved_by_difficulty = defaultdict(list)
             for number in potd_list:
-                if number > current_potd or number <= 0:
-                    difficulty = "(Unknown)"
-                else:
-                    potd_row = await potd_utils.get_potd_row(number, potd_rows)
-                    if len(potd_row) > cfg.config["potd_sheet_difficulty_col"]:
-                        difficulty = potd_row[cfg.config["potd_sheet_difficulty_col"]]
-                    else:
-                        difficulty = "(Unknown)"
-
+                difficulty = difficulty_of(archive.get(number))
                 solved_by_difficulty[difficulty].append(number)
 
             sorted_keys = sorted(
-                solved_by_difficulty.keys(),
-                key=lambda x: (x.isnumeric(), int(x) if x.isnumeric() else x),
-                reverse=True,
+                solved_by_difficulty.keys(), key=difficulty_sort_key, reverse=True
             )
 
             output_string = f"# __Your {adjective} POTD__ \n"
@@ -331,10 +307,9 @@ class Marking(Cog):
                 if show_total:
                     total = len(
                         [
-                            potd
-                            for potd in potd_rows
-                            if len(potd) > cfg.config["potd_sheet_difficulty_col"]
-                            and potd[cfg.config["potd_sheet_difficulty_col"]] == key
+                            problem
+                            for problem in archive
+                            if problem.difficulty_label == key
                         ]
                     )
                     output_string += (
@@ -349,22 +324,16 @@ class Marking(Cog):
                         "**D" + key + ":** " + f"{solved_by_difficulty[key]} " + "\n"
                     )
             if show_total:
-                output_string += f"(Total: {len(potd_list)}/{len(potd_rows)})"
+                output_string += f"(Total: {len(potd_list)}/{len(archive)})"
 
         elif flag == "s":
             solved_by_genre = {"A": [], "C": [], "G": [], "N": []}
             for number in potd_list:
-                if number > current_potd or number <= 0:
-                    genre = "(Unknown)"
-                else:
-                    potd_row = potd_rows[current_potd - number]
-                    if len(potd_row) > cfg.config["potd_sheet_genre_col"]:
-                        genre = potd_row[cfg.config["potd_sheet_genre_col"]]
-                    else:
-                        genre = "(Unknown)"
+                problem = archive.get(number)
+                genre = 0 if problem is None else problem.genre
 
                 for subj in "ACGN":
-                    if subj in genre:
+                    if genre & GENRE_BITS[subj]:
                         solved_by_genre[subj].append(number)
 
             output_string = f"# __Your {adjective} POTD__ \n"
@@ -372,10 +341,9 @@ class Marking(Cog):
                 if show_total:
                     total = len(
                         [
-                            potd
-                            for potd in potd_rows
-                            if len(potd) > cfg.config["potd_sheet_genre_col"]
-                            and key in potd[cfg.config["potd_sheet_genre_col"]]
+                            problem
+                            for problem in archive
+                            if problem.genre & GENRE_BITS[key]
                         ]
                     )
                     output_string += (
@@ -390,7 +358,7 @@ class Marking(Cog):
                         "**" + key + ":** " + f"{solved_by_genre[key]} " + "\n"
                     )
             if show_total:
-                output_string += f"(Total: {len(potd_list)}/{len(potd_rows)})"
+                output_string += f"(Total: {len(potd_list)}/{len(archive)})"
 
         elif flag == "sd":
             solved_ordered = {
@@ -400,43 +368,28 @@ class Marking(Cog):
                 "N": defaultdict(list),
             }
             for number in potd_list:
-                if number > current_potd or number <= 0:
-                    genre = "(Unknown)"
-                    difficulty = "(Unknown)"
-                else:
-                    potd_row = potd_rows[current_potd - number]
-                    if len(potd_row) > cfg.config["potd_sheet_genre_col"]:
-                        genre = potd_row[cfg.config["potd_sheet_genre_col"]]
-                    else:
-                        genre = "(Unknown)"
-                    if len(potd_row) > cfg.config["potd_sheet_difficulty_col"]:
-                        difficulty = potd_row[cfg.config["potd_sheet_difficulty_col"]]
-                    else:
-                        difficulty = "(Unknown)"
+                problem = archive.get(number)
+                genre = 0 if problem is None else problem.genre
+                difficulty = difficulty_of(problem)
 
                 for subj in "ACGN":
-                    if subj in genre:
+                    if genre & GENRE_BITS[subj]:
                         solved_ordered[subj][difficulty].append(number)
 
             output_string = f"# __Your {adjective} POTD__ \n"
             for subj in solved_ordered:
                 output_string += f"## {subj}: \n"
                 sorted_keys = sorted(
-                    solved_ordered[subj].keys(),
-                    key=lambda x: (x.isnumeric(), int(x) if x.isnumeric() else x),
-                    reverse=True,
+                    solved_ordered[subj].keys(), key=difficulty_sort_key, reverse=True
                 )
                 for diff in sorted_keys:
                     if show_total:
                         total = len(
                             [
-                                potd
-                                for potd in potd_rows
-                                if len(potd) > cfg.config["potd_sheet_difficulty_col"]
-                                and len(potd) > cfg.config["potd_sheet_genre_col"]
-                                and subj in potd[cfg.config["potd_sheet_genre_col"]]
-                                and potd[cfg.config["potd_sheet_difficulty_col"]]
-                                == diff
+                                problem
+                                for problem in archive
+                                if problem.genre & GENRE_BITS[subj]
+                                and problem.difficulty_label == diff
                             ]
                         )
                         output_string += (
@@ -452,10 +405,9 @@ class Marking(Cog):
                     probs = [potd for l in solved_ordered[subj].values() for potd in l]
                     total_subj = len(
                         [
-                            potd
-                            for potd in potd_rows
-                            if len(potd) > cfg.config["potd_sheet_genre_col"]
-                            and potd[cfg.config["potd_sheet_genre_col"]] == subj
+                            problem
+                            for problem in archive
+                            if problem.genre == GENRE_BITS[subj]
                         ]
                     )
                     output_string += f"(Total: {len(probs)}/{total_subj}) \n"
@@ -465,7 +417,7 @@ class Marking(Cog):
             else:
                 output_string = f"__**Your {adjective} POTD**__ \n{potd_list}" + "\n"
             if show_total:
-                output_string += f"(Total: {len(potd_list)}/{len(potd_rows)})"
+                output_string += f"(Total: {len(potd_list)}/{len(archive)})"
         await self.send_potd_solved(ctx, output_string)
 
     # send message in batches of 1900+e characters because of 2k character
@@ -5,8 +5,6 @@ import discord
 from discord.ext import commands
 from discord.ext.commands import BucketType
 
-from cogs.config import Config as cfg
-
 Cog = commands.Cog
 
 from utils import potd_utils
@@ -127,8 +125,11 @@ class Mock(Cog):
 
         # set up variables
         problems_tex = []
-        potds = await potd_utils.get_potd_values()
-        already_picked = []
+        archive = await potd_utils.get_archive()
+        already_picked = set()
+        solved_potd = set()
+        if search_unsolved:
+            solved_potd = await potd_utils.get_solved_or_read_potds(ctx)
 
         # render the mock paper
         for i in range(0, len(difficulty_bounds)):
@@ -136,13 +137,12 @@ class Mock(Cog):
                 difficulty_bounds[i][0],
                 difficulty_bounds[i][1],
                 genres[i],
-                potds,
+                archive,
                 already_picked,
-                ctx,
-                search_unsolved,
+                solved_potd,
             )
-            already_picked.append(picked_potd)
-            potd_statement = self.get_potd_statement(int(picked_potd), potds)
+            already_picked.add(picked_potd)
+            potd_statement = self.get_potd_statement(int(picked_potd), archive)
             problems_tex.append(
                 rf"\textbf{{Problem {i+1}. (POTD {str(picked_potd)})}}\\ "
                 + potd_statement
@@ -209,8 +209,9 @@ class Mock(Cog):
 
         # set up variables
         problems_tex = []
-        potds = await potd_utils.get_potd_values()
-        already_picked = []
+        archive = await potd_utils.get_archive()
+        already_picked = set()
+        solved_potd = await potd_utils.get_solved_or_read_potds(ctx)
         parsed_rules_string = self.stringify_mock_rules(parsed_rules)
 
         # render the mock paper
@@ -220,13 +221,12 @@ class Mock(Cog):
                     difficulty_bounds[i][0],
                     difficulty_bounds[i][1],
                     genres[i],
-                    potds,
+                    archive,
                     already_picked,
-                    ctx,
-                    True,
+                    solved_potd,
                 )
-                already_picked.append(picked_potd)
-                potd_statement = self.get_potd_statement(int(picked_potd), potds)
+                already_picked.add(picked_potd)
+                potd_statement = self.get_potd_statement(int(picked_potd), archive)
                 problems_tex.append(
                     rf"\textbf{{Problem {i+1}. (POTD {str(picked_potd)})}}\\ "
                     + potd_statement
@@ -289,22 +289,11 @@ class Mock(Cog):
 
         return True
 
-    def get_potd_statement(self, number: int, potds):
-        # this will be the top left cell which indicates the latest added potd
-        current_potd = int(potds[0][0])
-
-        if number > current_potd:
-            return None
-
-        potd_row = potds[current_potd - number]  # this gets the row requested
-
-        # Create the tex
-        potd_statement = ""
-        try:
-            potd_statement = potd_row[cfg.config["potd_sheet_statement_col"]]
-            return potd_statement
-        except IndexError:
+    def get_potd_statement(self, number: int, archive):
+        problem = archive.get(number)
+        if problem is None:
             return None
+        return problem.statement
 
     def parse_mock_rules(self, rules):
         parsed_rules = []
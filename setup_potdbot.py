@@ -43,6 +43,26 @@ DATABASES_TO_CREATE = [
         blacklisted_user_id INTEGER, 
         datetime TEXT
     );""",
+    """CREATE TABLE IF NOT EXISTS potd_problems (
+        potd_id INTEGER PRIMARY KEY,
+        date TEXT,
+        day TEXT,
+        curator TEXT,
+        source TEXT,
+        genre TEXT,
+        difficulty INTEGER,
+        tags TEXT,
+        statement TEXT,
+        hint1 TEXT,
+        hint2 TEXT,
+        hint3 TEXT,
+        answer TEXT,
+        discussion TEXT,
+        solution TEXT,
+        solution_link TEXT,
+        message_id TEXT,
+        image_link TEXT
+    );""",
 ]
 
 
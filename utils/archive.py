@@ -0,0 +1,294 @@
+from array import array
+from datetime import date, datetime
+from typing import Optional
+
+GENRES = "ACGN"
+GENRE_BITS = {genre: 1 << index for index, genre in enumerate(GENRES)}
+DATE_FORMAT = "%d %b %Y"
+
+# Columns of a stored problem record, in the order of the potd_problems table
+RECORD_COLUMNS = (
+    "potd_id",
+    "date",
+    "day",
+    "curator",
+    "source",
+    "genre",
+    "difficulty",
+    "tags",
+    "statement",
+    "hint1",
+    "hint2",
+    "hint3",
+    "answer",
+    "discussion",
+    "solution",
+    "solution_link",
+    "message_id",
+    "image_link",
+)
+
+
+def genre_mask(genres: str) -> int:
+    mask = 0
+    for genre in genres.upper():
+        mask |= GENRE_BITS.get(genre, 0)
+    return mask
+
+
+def genre_string(mask: int) -> str:
+    return "".join(genre for genre in GENRES if mask & GENRE_BITS[genre])
+
+
+def parse_date(text: str) -> Optional[date]:
+    try:
+        return datetime.strptime(text, DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+# A single POTD, parsed once when it is loaded rather than on every use.
+#
+# The long text columns (statement, hints, answer, discussion and solution) are
+# either held directly or, for problems loaded from a snapshot, fetched through
+# load_text, which returns them as a tuple in that order. Everything else is
+# always in memory.
+class Problem:
+    __slots__ = (
+        "id",
+        "date",
+        "day",
+        "curator",
+        "source",
+        "genre",
+        "difficulty",
+        "difficulty_label",
+        "tags",
+        "solution_link",
+        "message_id",
+        "image_link",
+        "has_content",
+        "_text",
+        "_load_text",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        date: Optional[date] = None,
+        day: str = "",
+        curator: str = "",
+        source: str = "",
+        genre: int = 0,
+        difficulty_label: str = "",
+        tags: str = "",
+        statement: str = "",
+        hints: tuple = ("", "", ""),
+        answer: str = "",
+        discussion: str = "",
+        solution: str = "",
+        solution_link: str = "",
+        message_id: str = "",
+        image_link: str = "",
+        load_text=None,
+        has_statement: Optional[bool] = None,
+    ):
+        self.id = id
+        self.date = date
+        self.day = day
+        self.curator = curator
+        self.source = source
+        self.genre = genre
+        # Difficulty is an int when the sheet has a number, otherwise None and
+        # the label keeps whatever marker the curator wrote
+        self.difficulty = (
+            int(difficulty_label) if difficulty_label.isnumeric() else None
+        )
+        self.difficulty_label = difficulty_label
+        self.tags = tags
+        self.solution_link = solution_link
+        self.message_id = message_id
+        self.image_link = image_link
+
+        if load_text is None:
+            self._text = (statement, *hints, answer, discussion, solution)
+            has_statement = statement != ""
+        else:
+            self._text = None
+        self._load_text = load_text
+        # Rows that only have their date and id filled in are not POTDs yet
+        self.has_content = has_statement or image_link != ""
+
+    @classmethod
+    def from_row(cls, potd_row: list, config: dict) -> Optional["Problem"]:
+        def cell(name):
+            col = config[f"potd_sheet_{name}_col"]
+            return potd_row[col] if len(potd_row) > col else ""
+
+        if not cell("id").isnumeric():
+            return None
+        return cls(
+            id=int(cell("id")),
+            date=parse_date(cell("date")),
+            day=cell("day"),
+            curator=cell("curator"),
+            source=cell("source"),
+            genre=genre_mask(cell("genre")),
+            difficulty_label=cell("difficulty"),
+            tags=cell("tags"),
+            statement=cell("statement"),
+            hints=(cell("hint1"), cell("hint2"), cell("hint3")),
+            answer=cell("answer"),
+            discussion=cell("discussion"),
+            solution=cell("solution"),
+            solution_link=cell("solution_link"),
+            message_id=cell("message_id"),
+            image_link=cell("image_link"),
+        )
+
+    @classmethod
+    def from_record(cls, record) -> "Problem":
+        fields = dict(zip(RECORD_COLUMNS, record))
+        text = {
+            column: "" if value is None else str(value)
+            for column, value in fields.items()
+        }
+        return cls(
+            id=fields["potd_id"],
+            date=date.fromisoformat(fields["date"]) if fields["date"] else None,
+            day=text["day"],
+            curator=text["curator"],
+            source=text["source"],
+            genre=genre_mask(text["genre"]),
+            difficulty_label=text["difficulty"],
+            tags=text["tags"],
+            statement=text["statement"],
+            hints=(text["hint1"], text["hint2"], text["hint3"]),
+            answer=text["answer"],
+            discussion=text["discussion"],
+            solution=text["solution"],
+            solution_link=text["solution_link"],
+            message_id=text["message_id"],
+            image_link=text["image_link"],
+        )
+
+    def to_record(self) -> dict:
+        return {
+            "potd_id": self.id,
+            "date": self.date.isoformat() if self.date else None,
+            "day": self.day,
+            "curator": self.curator,
+            "source": self.source,
+            "genre": self.genre_label,
+            "difficulty": self.difficulty_label,
+            "tags": self.tags,
+            "statement": self.statement,
+            "hint1": self.hints[0],
+            "hint2": self.hints[1],
+            "hint3": self.hints[2],
+            "answer": self.answer,
+            "discussion": self.discussion,
+            "solution": self.solution,
+            "solution_link": self.solution_link,
+            "message_id": self.message_id,
+            "image_link": self.image_link,
+        }
+
+    def _text_fields(self) -> tuple:
+        if self._text is not None:
+            return self._text
+        return self._load_text()
+
+    @property
+    def statement(self) -> str:
+        return self._text_fields()[0]
+
+    @property
+    def hints(self) -> tuple:
+        return self._text_fields()[1:4]
+
+    @property
+    def answer(self) -> str:
+        return self._text_fields()[4]
+
+    @property
+    def discussion(self) -> str:
+        return self._text_fields()[5]
+
+    @property
+    def solution(self) -> str:
+        return self._text_fields()[6]
+
+    @property
+    def genre_label(self) -> str:
+        return genre_string(self.genre)
+
+    @property
+    def date_label(self) -> str:
+        return self.date.strftime(DATE_FORMAT) if self.date else ""
+
+
+# Every POTD known to the bot, newest first like the sheet
+class Archive:
+    def __init__(self, problems):
+        self.problems = sorted(problems, key=lambda problem: problem.id, reverse=True)
+        self.by_id = {problem.id: problem for problem in self.problems}
+
+        # Ids of the POTDs released before a day, and that day. Each POTD is
+        # checked against its own date, once per day.
+        self._released = (None, frozenset())
+
+        # Ids of every POTD in increasing order, bucketed by difficulty (None for
+        # markers such as T) and genre bitmask
+        self.buckets = {}
+        for problem in reversed(self.problems):
+            key = (problem.difficulty, problem.genre)
+            self.buckets.setdefault(key, array("i")).append(problem.id)
+
+    def __len__(self):
+        return len(self.problems)
+
+    def __iter__(self):
+        return iter(self.problems)
+
+    @property
+    def latest(self) -> int:
+        return self.problems[0].id if self.problems else 0
+
+    def get(self, number: int) -> Optional[Problem]:
+        return self.by_id.get(number)
+
+    # Ids of the POTDs released before the given day. POTDs without a date are
+    # never counted as released.
+    def released_ids(self, day: date) -> frozenset:
+        if self._released[0] != day:
+            released = frozenset(
+                problem.id
+                for problem in self.problems
+                if problem.date is not None and problem.date < day
+            )
+            self._released = (day, released)
+        return self._released[1]
+
+    # Released ids with a difficulty in [lower, upper] and a genre containing
+    # every genre of at least one of the masks. An upper bound of None means no
+    # upper bound, and also lets in marker difficulties.
+    def candidate_ids(self, lower, upper, genre_masks, released) -> list:
+        ids = []
+        for (difficulty, genre), bucket in self.buckets.items():
+            if difficulty is None:
+                if upper is not None:
+                    continue
+            elif difficulty < lower or (upper is not None and difficulty > upper):
+                continue
+            if not any(genre & mask == mask for mask in genre_masks):
+                continue
+            ids.extend(number for number in bucket if number in released)
+        return ids
+
+    # New archive with the given problems added, replacing any with the same id
+    def merged(self, problems) -> "Archive":
+        by_id = dict(self.by_id)
+        for problem in problems:
+            by_id[problem.id] = problem
+        return Archive(by_id.values())
@@ -0,0 +1,118 @@
+import functools
+import re
+
+# Turns problem text into search terms: LaTeX macros become the words they
+# stand for, math delimiters and formatting are dropped, and the remaining words
+# are case-folded and stemmed so that e.g. "Triangles" and \triangle both become
+# "triangl".
+
+MACRO_PATTERN = re.compile(r"\\([a-zA-Z]+)")
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+# Macros that say what the problem is about, under the word someone would search
+MACRO_WORDS = {
+    "angle": "angle",
+    "measuredangle": "angle",
+    "triangle": "triangle",
+    "odot": "circle",
+    "circ": "degree",
+    "perp": "perpendicular",
+    "parallel": "parallel",
+    "cong": "congruent",
+    "sim": "similar",
+    "frac": "fraction",
+    "dfrac": "fraction",
+    "tfrac": "fraction",
+    "sqrt": "root",
+    "binom": "binomial",
+    "dbinom": "binomial",
+    "tbinom": "binomial",
+    "choose": "binomial",
+    "sum": "sum",
+    "prod": "product",
+    "int": "integral",
+    "iint": "integral",
+    "lim": "limit",
+    "ln": "log",
+    "infty": "infinity",
+    "pmod": "mod",
+    "bmod": "mod",
+    "equiv": "congruent",
+    "mid": "divides",
+    "lfloor": "floor",
+    "rfloor": "floor",
+    "lceil": "ceiling",
+    "rceil": "ceiling",
+}
+# Macros that only affect layout or typesetting
+IGNORED_MACROS = {
+    "begin",
+    "end",
+    "item",
+    "left",
+    "right",
+    "big",
+    "Big",
+    "bigg",
+    "Bigg",
+    "text",
+    "textbf",
+    "textit",
+    "emph",
+    "mathrm",
+    "mathbf",
+    "mathit",
+    "mathcal",
+    "mathbb",
+    "operatorname",
+    "displaystyle",
+    "quad",
+    "qquad",
+    "hspace",
+    "vspace",
+    "newline",
+    "noindent",
+    "cdot",
+    "cdots",
+    "ldots",
+    "dots",
+    "times",
+    "le",
+    "leq",
+    "ge",
+    "geq",
+    "ne",
+    "neq",
+    "in",
+}
+
+
+def _macro_word(match) -> str:
+    name = match.group(1)
+    if name in IGNORED_MACROS:
+        return " "
+    return " " + MACRO_WORDS.get(name, name) + " "
+
+
+# Light suffix stripping; it only has to map a word and its inflections to the
+# same term, not produce a real word. Words repeat a lot, so results are cached.
+@functools.lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)]
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def normalize(text: str) -> list:
+    text = MACRO_PATTERN.sub(_macro_word, text)
+    return [stem(word) for word in WORD_PATTERN.findall(text.casefold())]
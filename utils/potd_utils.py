@@ -1,86 +1,122 @@
 import asyncio
 import io
+import logging
 import os
 import random
 import re
 import subprocess
-import uuid
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import date, datetime, timedelta, timezone
+from itertools import takewhile
 from typing import Optional
 
 import aiohttp
 import discord
-from pdf2image import convert_from_path
 
 from cogs.config import Config as cfg
+from utils import render, sheets, snapshot
+from utils.archive import RECORD_COLUMNS, Archive, Problem, genre_mask
+from utils.single_flight import SingleFlight
 
 POTD_RANGE = "POTD!A2:S"
 CURATOR_RANGE = "Curators!A3:E"
+# Top left cell of the POTD sheet, which holds the latest POTD number
+LATEST_POTD_CELL = "POTD!A2"
+# Sheet row of the latest POTD; older POTDs follow one per row
+FIRST_POTD_ROW = 2
+SNAPSHOT_PATH = "data/potd_archive.snapshot"
+
+logger = logging.getLogger(__name__)
+
+# In-process copy of the POTD sheet shared by every command. Once warm, stale
+# values are served immediately while a background task refreshes them.
+_potd_cache = {
+    "archive": None,
+    "fetched_at": float("-inf"),
+    "full_sync_at": None,
+    "refresh_task": None,
+    # Drive modifiedTime of the spreadsheet at the last full sync
+    "modified_time": None,
+    # Set while the archive cog keeps the caches fresh, so readers never start
+    # refreshes of their own
+    "background_refresh": False,
+}
+# Map from every curator alias to their Discord id, cached the same way
+_curator_cache = {"index": None, "fetched_at": float("-inf"), "refresh_task": None}
+_refreshes = SingleFlight()
 
 
 # Create png from latex string locally
 async def generate_latex(latex, channel, spoiler):
-    with open(f"config/{cfg.config['preamble']}", "r") as preamble:
-        full_doc = preamble.read() + "\n" + latex + "\n" + r"\end{document}"
-    file_name = str(uuid.uuid4())
+    path = await render.render_latex(latex)
+    file_name = os.path.basename(path)
     # Bots only spoil images if "SPOILER_" is in front
     if spoiler:
         file_name = "SPOILER_" + file_name
 
-    # Run PDFLaTeX on tex code
-    with open(f"{file_name}.tex", "w") as latex_file:
-        latex_file.write(full_doc)
-    pdflatex = await asyncio.create_subprocess_exec(
-        "pdflatex",
-        f"{file_name}.tex",
-        "--interaction=nonstopmode",
-        stdout=open(os.devnull, "wb"),
-    )
-    await pdflatex.wait()
-
-    pic = convert_from_path(f"{file_name}.pdf", 500)[0]
-    width, height = pic.size
-    # Crop out white lines on edge of picture for some reason
-    left = 5
-    right = width - 5
-    top = 5
-    bottom = height - 5
-    pic = pic.crop((left, top, right, bottom))
-    pic.save(f"{file_name}.png")
-
-    with open(f"{file_name}.png", "rb") as f:
-        render = discord.File(f)
-        await channel.send(file=render)
+    with open(path, "rb") as f:
+        render_file = discord.File(f, filename=file_name)
+        await channel.send(file=render_file)
 
-    # Delete files
-    for fname in os.listdir("."):
-        if fname.startswith(file_name):
-            os.remove(fname)
 
-
-async def texify_potd(potd_row, channel, spoiler) -> None:
+async def texify_potd(problem, channel, spoiler) -> None:
     latex = (
         "\\textbf{Day "
-        + str(potd_row[cfg.config["potd_sheet_id_col"]])
+        + str(problem.id)
         + "} --- "
-        + str(potd_row[cfg.config["potd_sheet_day_col"]])
+        + problem.day
         + " "
-        + str(potd_row[cfg.config["potd_sheet_date_col"]])
+        + problem.date_label
         + "\\vspace{11pt}\\\\\\setlength\\parindent{1.5em}"
-        + str(potd_row[cfg.config["potd_sheet_statement_col"]])
+        + problem.statement
     )
     await generate_latex(latex, channel, spoiler)
 
 
-def curator_id(curators, value):
-    value = str(value)
-    if value == "":
-        return None
-    for i in curators:
-        for j in range(min(len(i), 4)):
-            if value == str(i[j]):
-                return i[0]
-    return None
+# The first four columns of the curator sheet are the Discord id and aliases
+def build_curator_index(curators):
+    index = {}
+    for curator in curators:
+        for alias in curator[:4]:
+            if str(alias) != "":
+                index.setdefault(str(alias), curator[0])
+    return index
+
+
+def curator_id(curator_index, value):
+    return curator_index.get(str(value))
+
+
+async def refresh_curator_index():
+    index = build_curator_index(await sheets.get_values(CURATOR_RANGE))
+    _curator_cache["index"] = index
+    _curator_cache["fetched_at"] = time.monotonic()
+    return index
+
+
+async def _refresh_curator_index_quietly():
+    try:
+        await refresh_curator_index()
+    except Exception:
+        logger.exception("Background refresh of the curator sheet failed.")
+
+
+async def get_curator_index():
+    index = _curator_cache["index"]
+    if index is None:
+        return await refresh_curator_index()
+
+    if _potd_cache["background_refresh"]:
+        return index
+
+    fetched_at = _curator_cache["fetched_at"]
+    if time.monotonic() - fetched_at > cfg.config["curator_cache_ttl"]:
+        task = _curator_cache["refresh_task"]
+        if task is None or task.done():
+            _curator_cache["refresh_task"] = asyncio.create_task(
+                _refresh_curator_index_quietly()
+            )
+    return index
 
 
 async def blacklist(caller_id):
@@ -121,25 +157,14 @@ async def unblacklisted_ratings(caller_id, potd):
 
 
 # Create an embed showing info on a POTD
-async def generate_source(potd_row, display=True, caller_id=0):
+async def generate_source(problem, display=True, caller_id=0):
     # Figure out whose potd it is
-    async with cfg.aiogoogle as aiogoogle:
-        curators = (
-            await cfg.aiogoogle.as_service_account(
-                cfg.spreadsheet.values.get(
-                    spreadsheetId=cfg.config["potd_sheet"], range=CURATOR_RANGE
-                )
-            )
-        ).get("values", [])
-    curator = curator_id(curators, potd_row[cfg.config["potd_sheet_curator_col"]])
+    curator = curator_id(await get_curator_index(), problem.curator)
     if curator is None:
         curator = "Unknown Curator"
     else:
         curator = f"<@!{curator}>"
-    difficulty_length = len(potd_row[cfg.config["potd_sheet_genre_col"]]) + len(
-        potd_row[cfg.config["potd_sheet_difficulty_col"]]
-    )
-    padding = " " * (max(35 - len(potd_row[cfg.config["potd_sheet_source_col"]]), 1))
+    padding = " " * (max(35 - len(problem.source), 1))
 
     source = discord.Embed()
     source.add_field(name="Curator", value=curator)
@@ -147,15 +172,15 @@ async def generate_source(potd_row, display=True, caller_id=0):
     if display:
         source.add_field(
             name="Source",
-            value=f'||`{potd_row[cfg.config["potd_sheet_source_col"]]}{padding}`||',
+            value=f"||`{problem.source}{padding}`||",
         )
         source.add_field(
             name="Difficulty",
-            value=f'||`{str(potd_row[cfg.config["potd_sheet_difficulty_col"]]).ljust(5)}`||',
+            value=f"||`{problem.difficulty_label.ljust(5)}`||",
         )
         source.add_field(
             name="Genre",
-            value=f'||`{str(potd_row[cfg.config["potd_sheet_genre_col"]]).ljust(5)}`||',
+            value=f"||`{problem.genre_label.ljust(5)}`||",
         )
     else:
         source.add_field(name="Source", value=f"(To be revealed)")
@@ -163,56 +188,63 @@ async def generate_source(potd_row, display=True, caller_id=0):
         source.add_field(name="Genre", value=f"(To be revealed)")
 
     # Community Rating footer
-    results = await unblacklisted_ratings(
-        caller_id, potd_row[cfg.config["potd_sheet_id_col"]]
-    )
+    results = await unblacklisted_ratings(caller_id, problem.id)
     community_rating = ""
 
     if len(results) > 0:
         community_rating += f"There are {len(results)} community difficulty ratings. "
-        if display:
-            try:
-                underrate_count = sum(
-                    row[2] < int(potd_row[cfg.config["potd_sheet_difficulty_col"]])
-                    for row in results
+        if display and problem.difficulty is not None:
+            underrate_count = sum(row[2] < problem.difficulty for row in results)
+            if underrate_count > 0:
+                community_rating += (
+                    f"{underrate_count} rated lower than current rating. "
                 )
-                if underrate_count > 0:
-                    community_rating += (
-                        f"{underrate_count} rated lower than current rating. "
-                    )
-                overrate_count = sum(
-                    row[2] > int(potd_row[cfg.config["potd_sheet_difficulty_col"]])
-                    for row in results
+            overrate_count = sum(row[2] > problem.difficulty for row in results)
+            if overrate_count > 0:
+                community_rating += (
+                    f"{overrate_count} rated higher than current rating. "
                 )
-                if overrate_count > 0:
-                    community_rating += (
-                        f"{overrate_count} rated higher than current rating. "
-                    )
-            except BaseException:
-                pass
         community_rating += "\n"
 
     # Final footer
     source.set_footer(
         text=f"{community_rating}Use -rating "
-        f'{potd_row[cfg.config["potd_sheet_id_col"]]} to check the '
+        f"{problem.id} to check the "
         f"community difficulty rating of this problem or -rate "
-        f'{potd_row[cfg.config["potd_sheet_id_col"]]} rating to rate it'
+        f"{problem.id} rating to rate it"
         f" yourself. React with a 👍 if you liked the problem. "
     )
 
     return source
 
 
+# Sources are revealed once a POTD is more than a day old, counting from the
+# 10:00 post
+def is_source_revealed(problem):
+    if problem.date is None:
+        return False
+    reveal_after = datetime.combine(problem.date, datetime.min.time())
+    return datetime.now() - timedelta(hours=10, days=1) > reveal_after
+
+
+# Ids of the POTDs whose sources are not out yet. These are the newest ones, so
+# the archive only has to be read until the first revealed source.
+def hidden_source_ids(archive):
+    return {
+        problem.id
+        for problem in takewhile(
+            lambda problem: not is_source_revealed(problem), archive
+        )
+    }
+
+
 async def edit_source(bot, potd):
-    potd_row = await get_potd_row(potd)
+    problem = await get_problem(potd)
     try:
-        if datetime.now() - timedelta(hours=10, days=1) > datetime.strptime(
-            potd_row[cfg.config["potd_sheet_date_col"]], "%d %b %Y"
-        ):
-            potd_source = await generate_source(potd_row, True)
+        if is_source_revealed(problem):
+            potd_source = await generate_source(problem, True)
         else:
-            potd_source = await generate_source(potd_row, False)
+            potd_source = await generate_source(problem, False)
 
         async with cfg.pool.acquire() as conn:
             async with conn.cursor() as cursor:
@@ -230,56 +262,350 @@ async def edit_source(bot, potd):
         pass
 
 
-async def get_potd_values():
-    async with cfg.aiogoogle as aiogoogle:
-        sheet = await aiogoogle.as_service_account(
-            cfg.spreadsheet.values.get(
-                spreadsheetId=cfg.config["potd_sheet"], range=POTD_RANGE
+async def mirror_problems(problems, replace_all=False):
+    columns = ", ".join(RECORD_COLUMNS)
+    placeholders = ", ".join(f":{column}" for column in RECORD_COLUMNS)
+
+    async with cfg.pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute("BEGIN")
+            try:
+                if replace_all:
+                    await cursor.execute("DELETE FROM potd_problems")
+                await cursor.executemany(
+                    f"""INSERT OR REPLACE INTO potd_problems ({columns})
+                    VALUES ({placeholders})""",
+                    [problem.to_record() for problem in problems],
+                )
+            except BaseException:
+                await cursor.execute("ROLLBACK")
+                raise
+            await cursor.execute("COMMIT")
+
+
+# A failed mirror write must not throw away a successful download. The next
+# refresh downloads the whole sheet again, which rewrites the whole mirror.
+async def _mirror_problems_quietly(problems, replace_all=False):
+    try:
+        await mirror_problems(problems, replace_all)
+    except Exception:
+        logger.exception("Could not mirror the POTD sheet to the database.")
+        _potd_cache["full_sync_at"] = None
+        _potd_cache["modified_time"] = None
+
+
+# Every POTD in the SQLite mirror of the sheet, newest first
+async def query_potd_problems():
+    columns = ", ".join(RECORD_COLUMNS)
+    async with cfg.pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                f"SELECT {columns} FROM potd_problems ORDER BY potd_id DESC"
             )
-        )
-        values = sheet.get("values", [])
-    return values
+            return [Problem.from_record(record) for record in await cursor.fetchall()]
+
+
+def parse_potd_rows(potd_rows):
+    problems = (Problem.from_row(potd_row, cfg.config) for potd_row in potd_rows)
+    return [problem for problem in problems if problem is not None]
+
 
+def potd_rows_range(first_row, last_row):
+    return f"POTD!A{first_row}:S{last_row}"
 
-async def get_potd_row(number, values=None):
-    # Output of get_potd_values() was not fed into get_potd_row
-    if values is None:
-        values = await get_potd_values()
 
-    # this will be the top left cell which indicates the latest added potd
-    current_potd = int(values[0][0])
+# Range holding the flags curators set on rows edited since they were synced
+def edited_flags_range(first_row=FIRST_POTD_ROW, last_row=None):
+    edited_col = cfg.config["potd_sheet_edited_col"]
+    return sheets.column_range("POTD", edited_col, edited_col, first_row, last_row)
 
-    if number > current_potd or number < 1:
+
+# Whether a problem fetched from the sheet differs from the archive's copy
+def _differs(archive, problem):
+    current = archive.get(problem.id)
+    return current is None or current.to_record() != problem.to_record()
+
+
+# Bring a previously loaded archive up to date, fetching only the rows added
+# since then, the rows that had no content yet and the rows flagged as edited.
+# Returns the synced archive and the problems that changed, or None if the
+# archive cannot be patched and the whole sheet has to be downloaded again. If
+# nothing changed, the archive itself is returned, so it does not have to be
+# mirrored or indexed again.
+async def sync_archive(archive):
+    # One round trip for the latest POTD number and the edited flags...
+    ranges = [LATEST_POTD_CELL]
+    if cfg.config["potd_sheet_edited_col"] is not None:
+        ranges.append(edited_flags_range())
+    fetched = await sheets.batch_get(*ranges)
+    latest_cell = fetched[0]
+    flags = fetched[1] if len(fetched) > 1 else []
+    latest = int(latest_cell[0][0])
+    added = latest - archive.latest
+    if added < 0:
         return None
+    edited_rows = {
+        FIRST_POTD_ROW + index
+        for index, flag in enumerate(flags)
+        if len(flag) > 0 and flag[0] != ""
+    }
+    # Rows are often created with only their number ahead of time and filled in
+    # later, without being flagged
+    empty_rows = {
+        FIRST_POTD_ROW + latest - problem.id
+        for problem in archive
+        if not problem.has_content
+    }
+
+    # ...and another for the new, empty and edited rows themselves
+    first_old_row = FIRST_POTD_ROW + added
+    ranges = [
+        potd_rows_range(row, row)
+        for row in sorted(edited_rows | empty_rows)
+        if row >= first_old_row
+    ]
+    if added > 0:
+        ranges.insert(0, potd_rows_range(FIRST_POTD_ROW, first_old_row - 1))
+    fetched = await sheets.batch_get(*ranges) if ranges else []
+
+    # Results may be shared with other callers, so they are not modified here
+    new_rows, old_rows = (fetched[0], fetched[1:]) if added > 0 else ([], fetched)
+    if len(new_rows) != added:
+        return None
+    fetched_problems = parse_potd_rows(
+        new_rows + [rows[0] for rows in old_rows if rows]
+    )
+    changed = [problem for problem in fetched_problems if _differs(archive, problem)]
 
+    # The flagged rows are synced now, so take the flags down again. If that
+    # fails, they are just fetched again next time.
+    if edited_rows:
+        try:
+            await sheets.batch_clear(
+                *(edited_flags_range(row, row) for row in sorted(edited_rows))
+            )
+        except Exception:
+            logger.exception("Could not clear the edited flags in the POTD sheet.")
+    if not changed:
+        return archive, changed
+    return archive.merged(changed), changed
+
+
+# Drive modifiedTime of the spreadsheet, or None if it could not be checked
+async def _spreadsheet_modified_time():
     try:
-        # this gets the row requested
-        potd_row = values[current_potd - number]
-        return potd_row
-    except IndexError:
+        return await sheets.modified_time()
+    except Exception:
+        logger.exception("Could not check when the POTD sheet was modified.")
         return None
 
 
-def check_for_image_link(potd_row) -> Optional[str]:
-    if len(potd_row) >= 19 and potd_row[
-        cfg.config["potd_sheet_image_link_col"]
-    ] not in [None, ""]:
-        return potd_row[cfg.config["potd_sheet_image_link_col"]]
+# Only one refresh runs at a time, as each one replaces the whole mirror and
+# snapshot. Callers arriving during a refresh wait for it instead of starting
+# their own.
+async def refresh_archive(full=False):
+    return await _refreshes.run("archive", lambda: _refresh_archive(full))
+
+
+async def _refresh_archive(full):
+    archive = _potd_cache["archive"]
+    now = time.monotonic()
+
+    # Nothing in the spreadsheet has changed since the last full sync, so there
+    # is nothing to download
+    modified_time = await _spreadsheet_modified_time()
+    if (
+        archive is not None
+        and modified_time is not None
+        and modified_time == _potd_cache["modified_time"]
+    ):
+        _potd_cache["fetched_at"] = now
+        return archive
+
+    # Edits to rows that are neither new, empty nor flagged are only picked up
+    # by a full download, so do one every so often
+    full_sync_at = _potd_cache["full_sync_at"]
+    if (
+        full_sync_at is None
+        or now - full_sync_at > cfg.config["potd_full_sync_interval"]
+    ):
+        full = True
+
+    synced = None
+    if not full and archive is not None:
+        synced = await sync_archive(archive)
+    if synced is None:
+        # The curators are wanted by the same commands, so fetch them too
+        potd_rows, curators = await sheets.batch_get(POTD_RANGE, CURATOR_RANGE)
+        archive = Archive(parse_potd_rows(potd_rows))
+        _curator_cache["index"] = build_curator_index(curators)
+        _curator_cache["fetched_at"] = now
+        _potd_cache["full_sync_at"] = now
+        # Only a full download is known to have seen every edit up to here
+        _potd_cache["modified_time"] = modified_time
+        await _mirror_problems_quietly(archive, replace_all=True)
+    else:
+        archive, changed = synced
+        if not changed:
+            _potd_cache["fetched_at"] = now
+            return archive
+        await _mirror_problems_quietly(changed)
+    archive = await asyncio.to_thread(_snapshot_archive, archive)
+
+    _potd_cache["archive"] = archive
+    _potd_cache["fetched_at"] = now
+    return archive
+
+
+# Save the archive to the snapshot and serve it from there, so that its long text
+# columns are only read into memory when they are used. If it cannot be saved,
+# the archive is served as it is.
+def _snapshot_archive(archive):
+    try:
+        snapshot.write(archive, SNAPSHOT_PATH)
+    except Exception:
+        logger.exception("Could not save the POTD archive snapshot.")
+        return archive
+    lazy_archive = snapshot.load(SNAPSHOT_PATH, cfg.config["potd_text_cache_size"])
+    return archive if lazy_archive is None else lazy_archive
+
+
+async def _refresh_archive_quietly():
+    try:
+        await refresh_archive()
+    except Exception:
+        logger.exception("Background refresh of the POTD sheet failed.")
+
+
+def _schedule_archive_refresh():
+    if _potd_cache["background_refresh"]:
+        return
+    # Only one background refresh at a time
+    task = _potd_cache["refresh_task"]
+    if task is None or task.done():
+        _potd_cache["refresh_task"] = asyncio.create_task(_refresh_archive_quietly())
+
+
+# Cold cache: start from the SQLite mirror if it has anything, so that the bot
+# has data straight away even when Google is slow or down
+async def _load_mirrored_archive():
+    # The snapshot is much faster to load, with the mirror as a fallback
+    archive = snapshot.load(SNAPSHOT_PATH, cfg.config["potd_text_cache_size"])
+    if archive is None:
+        problems = await query_potd_problems()
+        if not problems:
+            return None
+        archive = Archive(problems)
+    _potd_cache["archive"] = archive
+    _potd_cache["fetched_at"] = float("-inf")
+    return archive
+
+
+async def get_archive():
+    archive = _potd_cache["archive"]
+    if archive is None:
+        archive = await _load_mirrored_archive()
+        if archive is None:
+            return await refresh_archive()
+
+    # Stale cache: serve what we have and refresh behind the scenes
+    if time.monotonic() - _potd_cache["fetched_at"] > cfg.config["potd_cache_ttl"]:
+        _schedule_archive_refresh()
+    return archive
+
+
+# The archive as last published, without waiting on anything. It is never
+# modified once published, only replaced, so it can be held onto.
+def archive_snapshot() -> Optional[Archive]:
+    return _potd_cache["archive"]
+
+
+# Whether the archive has gone too long without a successful sync, e.g. because
+# Google is down and it is being served from the SQLite mirror
+def is_archive_stale():
+    fetched_at = _potd_cache["fetched_at"]
+    return time.monotonic() - fetched_at > cfg.config["potd_stale_after"]
+
+
+# Appended to replies that may be wrong because the archive is stale
+def staleness_note():
+    if not is_archive_stale():
+        return ""
+    return "(The POTD sheet could not be reached recently, so this may be out of date.)"
+
+
+def set_background_refresh(enabled):
+    _potd_cache["background_refresh"] = enabled
+
+
+# One pass of the archive cog's refresher
+async def refresh_caches():
+    if _potd_cache["archive"] is None:
+        await _load_mirrored_archive()
+    await refresh_archive()
+    fetched_at = _curator_cache["fetched_at"]
+    if time.monotonic() - fetched_at > cfg.config["curator_cache_ttl"]:
+        await refresh_curator_index()
+
+
+# Fetch a single POTD from the sheet without downloading the rest. Rows run from
+# the latest POTD downwards, so the row of a POTD follows from its number.
+async def fetch_problem(number):
+    latest_cell = await sheets.get_values(LATEST_POTD_CELL)
+    latest = int(latest_cell[0][0])
+    if not 0 < number <= latest:
+        return None
+    row = FIRST_POTD_ROW + latest - number
+    problems = parse_potd_rows(await sheets.get_values(potd_rows_range(row, row)))
+    if not problems:
+        return None
+    # A gap or out of order row in the sheet breaks the offset; let the caller
+    # fall back to the whole archive
+    if problems[0].id != number:
+        raise LookupError(f"Row {row} of the POTD sheet is not POTD {number}.")
+    return problems[0]
+
+
+async def get_problem(number, archive=None):
+    # Output of get_archive() was not fed into get_problem
+    if archive is None:
+        archive = _potd_cache["archive"] or await _load_mirrored_archive()
+    if archive is None:
+        # Nothing loaded yet: answer from the one row this command needs and
+        # load the archive behind the scenes. With Google unreachable there is
+        # nothing to answer from at all.
+        if not sheets.is_available():
+            return None
+        _schedule_archive_refresh()
+        try:
+            return await fetch_problem(number)
+        except sheets.SheetsUnavailable:
+            return None
+        except LookupError:
+            archive = await get_archive()
+    elif time.monotonic() - _potd_cache["fetched_at"] > cfg.config["potd_cache_ttl"]:
+        _schedule_archive_refresh()
+    return archive.get(number)
+
+
+def check_for_image_link(problem) -> Optional[str]:
+    if problem.image_link != "":
+        return problem.image_link
     else:
         return None
 
 
 async def potd_fetch(ctx, number: int, flag: str = ""):
-    potd_row = await get_potd_row(number)
+    problem = await get_problem(number)
 
-    if potd_row is None:
-        await ctx.send(f"There is no potd for day {number}. ")
+    if problem is None:
+        await ctx.send(f"There is no potd for day {number}. {staleness_note()}")
         return
     else:
         # Create the message to send
         try:
             # if there is image link, just send it out
-            image_link = check_for_image_link(potd_row)
+            image_link = check_for_image_link(problem)
             if image_link and "t" not in flag:
                 async with aiohttp.ClientSession() as session:
                     async with session.get(image_link) as resp:
@@ -295,11 +621,11 @@ async def potd_fetch(ctx, number: int, flag: str = ""):
             # if no image link, send tex
             else:
                 if "s" not in flag:
-                    await texify_potd(potd_row, ctx.channel, False)
+                    await texify_potd(problem, ctx.channel, False)
                 else:
-                    await texify_potd(potd_row, ctx.channel, False)
+                    await texify_potd(problem, ctx.channel, False)
         except IndexError:
-            await ctx.send(f"There is no potd for day {number}. ")
+            await ctx.send(f"There is no potd for day {number}. {staleness_note()}")
             return
 
 
@@ -315,6 +641,18 @@ async def get_potd_status(status, ctx):
             return [row[0] for row in await cursor.fetchall()]
 
 
+# POTDs the caller has marked as solved or read, as a set for fast exclusion
+async def get_solved_or_read_potds(ctx):
+    async with cfg.pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                """SELECT potd_id FROM potd_status
+                WHERE user_id = ? AND status IN ('solved', 'read')""",
+                ctx.author.id,
+            )
+            return {row[0] for row in await cursor.fetchall()}
+
+
 async def get_potd_rated(ctx):
     async with cfg.pool.acquire() as conn:
         async with conn.cursor() as cursor:
@@ -324,89 +662,40 @@ async def get_potd_rated(ctx):
             return [row[0] for row in await cursor.fetchall()]
 
 
+# Pick a random POTD id matching the filters, preferring ones not already
+# picked and not solved or read by the caller
 async def pick_potd(
     diff_lower_bound_filter,
     diff_upper_bound_filter,
     genre_filter,
-    potds,
-    already_picked,
-    ctx,
-    search_unsolved: bool,
+    archive,
+    already_picked: set,
+    solved_potd: set,
 ):
-    solved_potd = []
-    if search_unsolved:
-        get_solved_potd = await get_potd_status("solved", ctx)
-        get_read_potd = await get_potd_status("read", ctx)
-        solved_potd = get_solved_potd + get_read_potd
-
-    def match_genre(x, genre_filter):
-        for genre in genre_filter:
-            if len(
-                set(x[cfg.config["potd_sheet_genre_col"]]).intersection(genre)
-            ) == len(genre):
-                return True
-        return False
-
-    today = datetime.strptime(datetime.now().strftime("%d %b %Y"), "%d %b %Y")
-
-    # filter by genre and difficulty
-    if isinstance(diff_upper_bound_filter, int):
-        filtered_potds = [
-            x
-            for x in potds
-            if len(x)
-            > max(
-                cfg.config["potd_sheet_difficulty_col"],
-                cfg.config["potd_sheet_genre_col"],
-            )
-            and x[cfg.config["potd_sheet_difficulty_col"]].isnumeric()
-            and int(x[cfg.config["potd_sheet_difficulty_col"]])
-            >= diff_lower_bound_filter
-            and int(x[cfg.config["potd_sheet_difficulty_col"]])
-            <= diff_upper_bound_filter
-            and match_genre(x, genre_filter)
-            and datetime.strptime(x[cfg.config["potd_sheet_date_col"]], "%d %b %Y")
-            < today
-        ]
-    else:  # if diff bound is "T"
-        filtered_potds = [
-            x
-            for x in potds
-            if len(x)
-            > max(
-                cfg.config["potd_sheet_difficulty_col"],
-                cfg.config["potd_sheet_genre_col"],
-            )
-            and (
-                (
-                    x[cfg.config["potd_sheet_difficulty_col"]].isnumeric()
-                    and int(x[cfg.config["potd_sheet_difficulty_col"]])
-                    >= diff_lower_bound_filter
-                )
-                or not x[cfg.config["potd_sheet_difficulty_col"]].isnumeric()
-            )
-            and match_genre(x, genre_filter)
-            and datetime.strptime(x[cfg.config["potd_sheet_date_col"]], "%d %b %Y")
-            < today
-        ]
+    # Each entry of the filter is a set of genres that must all be present
+    genre_masks = [genre_mask(genre) for genre in genre_filter]
+
+    # A difficulty upper bound of "T" means there is no upper bound
+    if not isinstance(diff_upper_bound_filter, int):
+        diff_upper_bound_filter = None
+
+    # Only POTDs released before today can be picked
+    filtered_potds_id = archive.candidate_ids(
+        diff_lower_bound_filter,
+        diff_upper_bound_filter,
+        genre_masks,
+        archive.released_ids(date.today()),
+    )
 
     # pick a POTD
-    if len(filtered_potds) > 0:
-        filtered_potds_id = list(
-            map(lambda x: int(x[cfg.config["potd_sheet_id_col"]]), filtered_potds)
-        )
-        unsolved_potds_id = [
-            x
-            for x in filtered_potds_id
-            if x not in solved_potd
-            if x not in already_picked
+    if len(filtered_potds_id) > 0:
+        not_repeated_potds_id = [
+            x for x in filtered_potds_id if x not in already_picked
         ]
+        unsolved_potds_id = [x for x in not_repeated_potds_id if x not in solved_potd]
         if len(unsolved_potds_id) > 0:
             picked_potd = int(random.choice(unsolved_potds_id))
         else:
-            not_repeated_potds_id = [
-                x for x in filtered_potds_id if x not in already_picked
-            ]
             if len(not_repeated_potds_id) > 0:
                 picked_potd = int(random.choice(not_repeated_potds_id))
             else:
@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+
+from pdf2image import convert_from_path
+
+from cogs.config import Config as cfg
+from utils.single_flight import SingleFlight
+
+# Rendered PNGs, named by the hash of everything that goes into them, so that a
+# given piece of LaTeX is only ever rendered once while it stays in the cache
+RENDER_CACHE = "data/renders"
+RENDER_DPI = 500
+# Pixels cropped from each edge, to get rid of white lines on the edges
+RENDER_CROP = 5
+
+# Formats dumped from the part of the preamble before \begin{document} with
+# mylatexformat, so pdflatex does not load every package again for each render.
+# Named by the hash of that part, so a changed preamble gets a new format.
+FORMAT_DIR = "data/latex"
+BEGIN_DOCUMENT = r"\begin{document}"
+
+logger = logging.getLogger(__name__)
+
+# The format build currently running, and formats that failed to build and
+# should not be tried again
+_format_builds = {"task": None, "failed": set()}
+
+# Renders currently running, keyed by render key. Everyone asking for the same
+# render while it runs waits on the one pdflatex run instead of starting another.
+_renders = SingleFlight()
+
+
+def render_key(preamble: str, latex: str) -> str:
+    settings = f"{RENDER_DPI}:{RENDER_CROP}"
+    content = "\0".join((settings, preamble, latex))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+# Remove the least recently used renders until the cache fits in its size limit
+def _evict_renders():
+    renders = []
+    for entry in os.scandir(RENDER_CACHE):
+        if entry.name.endswith(".png"):
+            stat = entry.stat()
+            renders.append((stat.st_mtime, stat.st_size, entry.path))
+
+    size = sum(render_size for _, render_size, _ in renders)
+    for _, render_size, path in sorted(renders):
+        if size <= cfg.config["render_cache_size"]:
+            break
+        os.remove(path)
+        size -= render_size
+
+
+# The preamble split into the part dumped into the format and the part from
+# \begin{document} on, which every render still runs
+def _split_preamble(preamble: str):
+    header, begin_document, body = preamble.partition(BEGIN_DOCUMENT)
+    return header, begin_document + body
+
+
+def _format_path(header: str) -> str:
+    name = "preamble-" + hashlib.sha256(header.encode()).hexdigest()[:16]
+    return os.path.join(FORMAT_DIR, name)
+
+
+async def _build_format(header: str, format_path: str):
+    os.makedirs(FORMAT_DIR, exist_ok=True)
+    with open(format_path + ".tex", "w") as format_file:
+        format_file.write(header + BEGIN_DOCUMENT + "\n" + r"\end{document}" + "\n")
+    pdflatex = await asyncio.create_subprocess_exec(
+        "pdflatex",
+        "-ini",
+        f"-jobname={os.path.basename(format_path)}",
+        f"-output-directory={FORMAT_DIR}",
+        "--interaction=nonstopmode",
+        "&pdflatex",
+        "mylatexformat.ltx",
+        format_path + ".tex",
+        stdout=open(os.devnull, "wb"),
+    )
+    await pdflatex.wait()
+    if pdflatex.returncode != 0 or not os.path.exists(format_path + ".fmt"):
+        _format_builds["failed"].add(format_path)
+        logger.warning("Could not build a LaTeX format from the preamble.")
+        return
+
+    # Formats for older preambles are not needed any more
+    for entry in os.scandir(FORMAT_DIR):
+        if not entry.path.startswith(format_path):
+            os.remove(entry.path)
+
+
+# Path of the format for the preamble, without its extension, or None if it is
+# not built yet. A missing format is built in the background, and renders go
+# without one until it is ready.
+def format_for(preamble: str):
+    header = _split_preamble(preamble)[0]
+    format_path = _format_path(header)
+    if os.path.exists(format_path + ".fmt"):
+        return format_path
+    task = _format_builds["task"]
+    if format_path not in _format_builds["failed"] and (task is None or task.done()):
+        _format_builds["task"] = asyncio.create_task(_build_format(header, format_path))
+    return None
+
+
+# Build the format for the current preamble ahead of the first render
+def prepare_format():
+    with open(f"config/{cfg.config['preamble']}", "r") as preamble_file:
+        format_for(preamble_file.read())
+
+
+async def _run_pdflatex(file_name: str, document: str, format_path=None):
+    with open(f"{file_name}.tex", "w") as latex_file:
+        latex_file.write(document)
+    options = [] if format_path is None else [f"-fmt={format_path}"]
+    pdflatex = await asyncio.create_subprocess_exec(
+        "pdflatex",
+        *options,
+        f"{file_name}.tex",
+        "--interaction=nonstopmode",
+        stdout=open(os.devnull, "wb"),
+    )
+    await pdflatex.wait()
+
+
+async def _render(preamble: str, latex: str, path: str):
+    file_name = str(uuid.uuid4())
+    try:
+        # Run PDFLaTeX on tex code, skipping the preamble if its format is built
+        format_path = format_for(preamble)
+        if format_path is not None:
+            body = _split_preamble(preamble)[1]
+            document = body + "\n" + latex + "\n" + r"\end{document}"
+            await _run_pdflatex(file_name, document, format_path)
+        if format_path is None or not os.path.exists(f"{file_name}.pdf"):
+            document = preamble + "\n" + latex + "\n" + r"\end{document}"
+            await _run_pdflatex(file_name, document)
+
+        pic = convert_from_path(f"{file_name}.pdf", RENDER_DPI)[0]
+        width, height = pic.size
+        pic = pic.crop(
+            (RENDER_CROP, RENDER_CROP, width - RENDER_CROP, height - RENDER_CROP)
+        )
+        # Save under a temporary name first so the cache never holds half a PNG
+        pic.save(f"{file_name}.png")
+        os.replace(f"{file_name}.png", path)
+    finally:
+        # Delete files
+        for fname in os.listdir("."):
+            if fname.startswith(file_name):
+                os.remove(fname)
+
+
+async def _render_into_cache(preamble: str, latex: str, path: str):
+    os.makedirs(RENDER_CACHE, exist_ok=True)
+    await _render(preamble, latex, path)
+    _evict_renders()
+
+
+# Path of a PNG of the LaTeX, rendering it only if it is not cached already
+async def render_latex(latex: str) -> str:
+    with open(f"config/{cfg.config['preamble']}", "r") as preamble_file:
+        preamble = preamble_file.read()
+    key = render_key(preamble, latex)
+    path = os.path.join(RENDER_CACHE, key + ".png")
+
+    if os.path.exists(path):
+        # Mark it as recently used
+        os.utime(path)
+        return path
+
+    await _renders.run(key, lambda: _render_into_cache(preamble, latex, path))
+    return path
@@ -0,0 +1,171 @@
+import asyncio
+import heapq
+import math
+from bisect import bisect_left
+from itertools import islice
+from typing import Optional
+
+from utils.archive import Archive
+from utils.normalize import normalize
+from utils.single_flight import SingleFlight
+from utils.sources import SourceIndex
+
+# BM25 parameters, and how much a match in each field counts for
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_BOOSTS = {"statement": 1.0, "source": 2.0, "tags": 1.5}
+
+# The indexes, with the archive they were last built for. They are rebuilt when
+# the archive changes.
+_index_cache = {"archive": None, "indexes": None}
+_builds = SingleFlight()
+
+
+# Search terms of each searchable field of every POTD with content, newest
+# first, so that every index works from one pass of normalize() over the archive
+def normalized_fields(archive: Archive) -> dict:
+    problems = [problem for problem in archive if problem.has_content]
+    return {
+        field: {problem.id: normalize(getattr(problem, field)) for problem in problems}
+        for field in FIELD_BOOSTS
+    }
+
+
+# Inverted index from each search term in a statement to the POTDs using it.
+# Statements are normalized once, when the index is built; queries only have to
+# normalize their keywords.
+class KeywordIndex:
+    def __init__(self, statements: dict):
+        # Ids of POTDs with a statement, newest first
+        self.ids = []
+        self.postings = {}
+        for number, terms in statements.items():
+            if not terms:
+                continue
+            self.ids.append(number)
+            for token in set(terms):
+                self.postings.setdefault(token, []).append(number)
+        self.vocabulary = sorted(self.postings)
+
+    # POTDs with a term starting with the keyword, so that partly typed words
+    # still match
+    def _matching(self, keyword: str) -> set:
+        start = bisect_left(self.vocabulary, keyword)
+        ids = set()
+        for token in islice(self.vocabulary, start, None):
+            if not token.startswith(keyword):
+                break
+            ids.update(self.postings[token])
+        return ids
+
+    # Ids of POTDs matching every keyword, newest first, stopping after limit
+    def search(self, keywords: list, limit: Optional[int] = None) -> list:
+        keywords = [token for keyword in keywords for token in normalize(keyword)]
+        if not keywords:
+            return self.ids[:limit]
+
+        # Walk the rarest keyword's matches and check them against the others
+        matches = sorted(map(self._matching, set(keywords)), key=len)
+        smallest, rest = matches[0], matches[1:]
+        found = (
+            number
+            for number in sorted(smallest, reverse=True)
+            if all(number in ids for ids in rest)
+        )
+        return list(islice(found, limit))
+
+
+# How much a term occurring count times in a field adds to a score, before
+# idf; longer fields than average count each occurrence for less
+def _term_frequency_weight(count: int, relative_length: float) -> float:
+    length_norm = 1 - BM25_B + BM25_B * relative_length
+    return count * (BM25_K1 + 1) / (count + BM25_K1 * length_norm)
+
+
+# BM25 weight of every term in one field of every problem, worked out when the
+# index is built so that a query only has to add them up
+class _FieldWeights:
+    def __init__(self, documents: dict, boost: float):
+        lengths = {number: len(terms) for number, terms in documents.items()}
+        average_length = sum(lengths.values()) / len(lengths) if lengths else 0
+
+        frequencies = {}
+        for number, terms in documents.items():
+            for term in terms:
+                counts = frequencies.setdefault(term, {})
+                counts[number] = counts.get(number, 0) + 1
+
+        self.weights = {}
+        for term, counts in frequencies.items():
+            matches = len(counts)
+            idf = math.log(1 + (len(documents) - matches + 0.5) / (matches + 0.5))
+            self.weights[term] = [
+                (
+                    number,
+                    boost
+                    * idf
+                    * _term_frequency_weight(count, lengths[number] / average_length),
+                )
+                for number, count in counts.items()
+            ]
+
+
+# Ranked search over the statement, source and tags of every released POTD
+class RankedIndex:
+    def __init__(self, fields: dict):
+        self.fields = {
+            field: _FieldWeights(fields[field], boost)
+            for field, boost in FIELD_BOOSTS.items()
+        }
+
+    # The best matches among the released ids, best first, as (id, score) pairs.
+    # Sources of the given ids do not count, so that searching cannot reveal a
+    # source before it is shown.
+    def search(
+        self, keywords: list, limit: int, released, hidden_sources=frozenset()
+    ) -> list:
+        terms = {term for keyword in keywords for term in normalize(keyword)}
+        scores = {}
+        for field, field_weights in self.fields.items():
+            for term in terms:
+                for number, weight in field_weights.weights.get(term, ()):
+                    if number not in released:
+                        continue
+                    if field == "source" and number in hidden_sources:
+                        continue
+                    scores[number] = scores.get(number, 0) + weight
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+# Every index over one archive
+class SearchIndexes:
+    def __init__(self, archive: Archive):
+        fields = normalized_fields(archive)
+        self.keyword = KeywordIndex(fields["statement"])
+        self.ranked = RankedIndex(fields)
+        self.source = SourceIndex(archive)
+
+
+# The indexes for the archive, built in a thread if they are not built yet, as
+# building them takes long enough to hold up every other command
+async def indexes(archive: Archive) -> SearchIndexes:
+    if _index_cache["archive"] is not archive:
+        built = await _builds.run(
+            id(archive), lambda: asyncio.to_thread(SearchIndexes, archive)
+        )
+        _index_cache["archive"] = archive
+        _index_cache["indexes"] = built
+        return built
+    return _index_cache["indexes"]
+
+
+async def keyword_index(archive: Archive) -> KeywordIndex:
+    return (await indexes(archive)).keyword
+
+
+async def ranked_index(archive: Archive) -> RankedIndex:
+    return (await indexes(archive)).ranked
+
+
+async def source_index(archive: Archive) -> SourceIndex:
+    return (await indexes(archive)).source
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from collections import deque
+
+from cogs.config import Config as cfg
+from utils.single_flight import SingleFlight
+
+# Sheets requests currently in flight, keyed by range. Concurrent callers
+# asking for the same ranges share one request instead of each sending their own.
+_requests = SingleFlight()
+
+# Circuit breaker around Google. After enough consecutive failures no requests
+# are sent until open_until, and each failed retry doubles the wait. Start times
+# of requests in the last minute are kept to stay under the per-minute quota.
+_breaker = {"failures": 0, "open_until": 0.0, "recent_requests": deque()}
+
+
+class SheetsUnavailable(Exception):
+    pass
+
+
+def column_letter(col):
+    return chr(ord("A") + col)
+
+
+# A1 notation for a block of columns, down to the bottom of the sheet if no
+# last row is given
+def column_range(sheet, first_col, last_col, first_row, last_row=None):
+    last_row = "" if last_row is None else last_row
+    return (
+        f"{sheet}!{column_letter(first_col)}{first_row}"
+        f":{column_letter(last_col)}{last_row}"
+    )
+
+
+# cfg.aiogoogle is kept open by the config cog, so requests reuse its session
+async def _fetch_values(range_name):
+    sheet = await cfg.aiogoogle.as_service_account(
+        cfg.spreadsheet.values.get(
+            spreadsheetId=cfg.config["potd_sheet"], range=range_name
+        )
+    )
+    return sheet.get("values", [])
+
+
+async def _fetch_batch(ranges):
+    sheet = await cfg.aiogoogle.as_service_account(
+        cfg.spreadsheet.values.batchGet(
+            spreadsheetId=cfg.config["potd_sheet"], ranges=list(ranges)
+        )
+    )
+    return [value_range.get("values", []) for value_range in sheet["valueRanges"]]
+
+
+async def _fetch_modified_time():
+    file = await cfg.aiogoogle.as_service_account(
+        cfg.drive.files.get(fileId=cfg.config["potd_sheet"], fields="modifiedTime")
+    )
+    return file["modifiedTime"]
+
+
+async def _clear_batch(ranges):
+    await cfg.aiogoogle.as_service_account(
+        cfg.spreadsheet.values.batchClear(
+            spreadsheetId=cfg.config["potd_sheet"], json={"ranges": list(ranges)}
+        )
+    )
+
+
+def _check_breaker(now):
+    if now < _breaker["open_until"]:
+        raise SheetsUnavailable(
+            f"Google is not being contacted for another "
+            f"{_breaker['open_until'] - now:.0f} seconds after repeated failures."
+        )
+
+    recent_requests = _breaker["recent_requests"]
+    while recent_requests and now - recent_requests[0] > 60:
+        recent_requests.popleft()
+    if len(recent_requests) >= cfg.config["sheets_quota_per_minute"]:
+        raise SheetsUnavailable("The Sheets quota for this minute has been used up.")
+    recent_requests.append(now)
+
+
+async def _guarded(fetch):
+    now = time.monotonic()
+    _check_breaker(now)
+    try:
+        result = await asyncio.wait_for(fetch(), cfg.config["sheets_timeout"])
+    except Exception:
+        _breaker["failures"] += 1
+        excess = _breaker["failures"] - cfg.config["sheets_failure_threshold"]
+        if excess >= 0:
+            backoff = cfg.config["sheets_backoff_base"] * 2**excess
+            _breaker["open_until"] = now + min(
+                backoff, cfg.config["sheets_backoff_max"]
+            )
+        raise
+    _breaker["failures"] = 0
+    return result
+
+
+def is_available():
+    return time.monotonic() >= _breaker["open_until"]
+
+
+async def _coalesce(key, fetch):
+    return await _requests.run(key, lambda: _guarded(fetch))
+
+
+async def get_values(range_name):
+    return await _coalesce(range_name, lambda: _fetch_values(range_name))
+
+
+# Fetch several ranges in a single round trip, returning their values in order
+async def batch_get(*ranges):
+    return await _coalesce(ranges, lambda: _fetch_batch(ranges))
+
+
+# When the spreadsheet was last edited, as reported by Drive. Any change to any
+# cell moves it, so it is a cheap way to tell whether anything needs fetching.
+async def modified_time():
+    return await _coalesce("modifiedTime", _fetch_modified_time)
+
+
+# Empty several ranges in a single round trip. Unlike reads, every call sends its
+# own request.
+async def batch_clear(*ranges):
+    await _guarded(lambda: _clear_batch(ranges))
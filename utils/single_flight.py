@@ -0,0 +1,24 @@
+import asyncio
+
+
+# Work currently running, keyed by what it produces. Callers asking for a key
+# that is already being worked on wait for that result instead of starting the
+# same work again.
+class SingleFlight:
+    def __init__(self):
+        self.in_flight = {}
+
+    def _forget(self, key, task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+
+    # Result of work(), a coroutine function, run at most once at a time per key
+    async def run(self, key, work):
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # A caller giving up (e.g. a cancelled command) must not cancel the work
+        # for everyone else waiting on it
+        return await asyncio.shield(task)
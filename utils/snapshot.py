@@ -0,0 +1,182 @@
+import functools
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from datetime import date
+from typing import Optional
+
+from utils.archive import Archive, Problem
+
+# Binary copy of the archive that can be memory-mapped at startup.
+#
+# Layout, in native byte order:
+#   header: magic, number of problems
+#   fixed-width int32 columns: id, date ordinal (0 if none) and genre mask, one
+#     entry per problem. Difficulties are in the heap as labels, which Problem
+#     parses itself.
+#   spans: (offset, length) into the heap for each text field of each problem
+#   heap: the UTF-8 text itself
+#
+# Loading decodes only the short text fields. The long ones stay in the mapped
+# file until a problem's text is used, and the most recently used are cached.
+MAGIC = b"POTDSNP3"
+HEADER = struct.Struct("=8sI")
+SHORT_FIELDS = (
+    "day",
+    "curator",
+    "source",
+    "difficulty_label",
+    "tags",
+    "solution_link",
+    "message_id",
+    "image_link",
+)
+# In the order Problem keeps its long text in
+LONG_FIELDS = (
+    "statement",
+    "hint1",
+    "hint2",
+    "hint3",
+    "answer",
+    "discussion",
+    "solution",
+)
+TEXT_FIELDS = SHORT_FIELDS + LONG_FIELDS
+
+
+def _texts(problem):
+    return (
+        problem.day,
+        problem.curator,
+        problem.source,
+        problem.difficulty_label,
+        problem.tags,
+        problem.solution_link,
+        problem.message_id,
+        problem.image_link,
+        problem.statement,
+        *problem.hints,
+        problem.answer,
+        problem.discussion,
+        problem.solution,
+    )
+
+
+def write(archive, path):
+    problems = archive.problems
+    ids = array("i", (problem.id for problem in problems))
+    dates = array(
+        "i", (problem.date.toordinal() if problem.date else 0 for problem in problems)
+    )
+    genres = array("i", (problem.genre for problem in problems))
+
+    spans = array("I")
+    heap = bytearray()
+    for problem in problems:
+        for text in _texts(problem):
+            encoded = text.encode()
+            spans.append(len(heap))
+            spans.append(len(encoded))
+            heap += encoded
+
+    # Write to a temporary file first, so processes mapping the old snapshot
+    # keep a consistent copy and a crash never leaves a partial one. Each writer
+    # gets a file of its own.
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as snapshot_file:
+            snapshot_file.write(HEADER.pack(MAGIC, len(problems)))
+            for column in (ids, dates, genres, spans):
+                snapshot_file.write(column.tobytes())
+            snapshot_file.write(heap)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def _read_column(mapped, position, typecode, length):
+    column = array(typecode)
+    end = position + column.itemsize * length
+    column.frombytes(mapped[position:end])
+    return column, end
+
+
+# Text of a mapped snapshot, decoded when it is asked for
+class _TextHeap:
+    def __init__(self, mapped, spans, heap_start, cache_size):
+        self.mapped = mapped
+        self.spans = spans
+        self.heap_start = heap_start
+        self.long_text = functools.lru_cache(maxsize=cache_size)(self._decode_long)
+
+    def _span(self, index, field):
+        position = 2 * (index * len(TEXT_FIELDS) + TEXT_FIELDS.index(field))
+        return self.heap_start + self.spans[position], self.spans[position + 1]
+
+    def length(self, index, field):
+        return self._span(index, field)[1]
+
+    def decode(self, index, field):
+        offset, length = self._span(index, field)
+        return self.mapped[offset : offset + length].decode()
+
+    def _decode_long(self, index):
+        return tuple(self.decode(index, field) for field in LONG_FIELDS)
+
+
+def _read(mapped, cache_size) -> Archive:
+    magic, count = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a POTD archive snapshot.")
+
+    position = HEADER.size
+    ids, position = _read_column(mapped, position, "i", count)
+    dates, position = _read_column(mapped, position, "i", count)
+    genres, position = _read_column(mapped, position, "i", count)
+    spans, heap_start = _read_column(
+        mapped, position, "I", 2 * count * len(TEXT_FIELDS)
+    )
+    heap = _TextHeap(mapped, spans, heap_start, cache_size)
+
+    problems = []
+    for index, number in enumerate(ids):
+        text = {field: heap.decode(index, field) for field in SHORT_FIELDS}
+        problems.append(
+            Problem(
+                id=number,
+                date=date.fromordinal(dates[index]) if dates[index] else None,
+                day=text["day"],
+                curator=text["curator"],
+                source=text["source"],
+                genre=genres[index],
+                difficulty_label=text["difficulty_label"],
+                tags=text["tags"],
+                solution_link=text["solution_link"],
+                message_id=text["message_id"],
+                image_link=text["image_link"],
+                load_text=functools.partial(heap.long_text, index),
+                has_statement=heap.length(index, "statement") > 0,
+            )
+        )
+    return Archive(problems)
+
+
+# The archive saved by write(), or None if there is no usable snapshot. The file
+# stays mapped for as long as any of its problems are in use; replacing it with
+# a new snapshot does not affect the old mapping.
+def load(path, cache_size=256) -> Optional[Archive]:
+    try:
+        with open(path, "rb") as snapshot_file:
+            mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        return _read(mapped, cache_size)
+    except (ValueError, struct.error):
+        mapped.close()
+        return None
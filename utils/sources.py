@@ -0,0 +1,100 @@
+import re
+from bisect import bisect_left
+from itertools import islice, takewhile
+from typing import NamedTuple, Optional
+
+from utils.archive import Archive
+
+TOKEN_PATTERN = re.compile(r"#|[A-Z]+\d*|\d+")
+YEAR_PATTERN = re.compile(r"(19|20)\d\d")
+# Lettered problem codes, e.g. G3 on a shortlist or B6 on the Putnam
+LETTERED_PATTERN = re.compile(r"[A-Z]\d{1,2}")
+NUMBERED_PATTERN = re.compile(r"[PQ](\d+)")
+ROMAN_ROUNDS = {"I", "II", "III", "IV"}
+PROBLEM_WORDS = {"#", "P", "Q", "PROBLEM"}
+ROUND_WORDS = {"DAY", "ROUND"}
+
+
+# A source as written in the sheet, split into its parts. Parts that are not
+# given are None.
+class Source(NamedTuple):
+    competition: str
+    year: Optional[str] = None
+    round: Optional[str] = None
+    problem: Optional[str] = None
+
+
+# Parses sources like "ISL 2019 G3", "USAMO 2005/3" or "2019 AIME I #5". Words
+# after the competition name that are not understood, such as "(modified)", are
+# ignored. Returns None if there is no competition name.
+def parse_source(text: str) -> Optional[Source]:
+    competition = []
+    year = round = problem = None
+    expecting = None
+    for token in TOKEN_PATTERN.findall(text.upper()):
+        numbered = NUMBERED_PATTERN.fullmatch(token)
+        if token.isdigit():
+            if expecting is None and year is None and YEAR_PATTERN.fullmatch(token):
+                year = token
+            elif expecting == "round":
+                round = token
+            else:
+                problem = token
+            expecting = None
+        elif token in PROBLEM_WORDS:
+            expecting = "problem"
+        elif token in ROUND_WORDS:
+            expecting = "round"
+        elif numbered:
+            problem = numbered.group(1)
+        elif competition and LETTERED_PATTERN.fullmatch(token):
+            problem = token
+        elif competition and token in ROMAN_ROUNDS:
+            round = token
+        elif not competition or (year is None and problem is None):
+            competition.append(token)
+
+    if not competition:
+        return None
+    return Source(" ".join(competition), year, round, problem)
+
+
+# Index of POTD sources by competition, for looking POTDs up by where they came
+# from
+class SourceIndex:
+    def __init__(self, archive: Archive):
+        self.by_competition = {}
+        for problem in archive:
+            source = parse_source(problem.source)
+            if source is not None:
+                entries = self.by_competition.setdefault(source.competition, [])
+                entries.append((source, problem.id))
+        self.competitions = sorted(self.by_competition)
+
+    # Competitions called name, or failing that, starting with it
+    def _competitions(self, name: str) -> list:
+        if name in self.by_competition:
+            return [name]
+        start = bisect_left(self.competitions, name)
+        return list(
+            takewhile(
+                lambda competition: competition.startswith(name),
+                islice(self.competitions, start, None),
+            )
+        )
+
+    # (source, id) of every POTD matching each part of the query that is given,
+    # newest first within each competition
+    def lookup(self, query: str) -> list:
+        wanted = parse_source(query)
+        if wanted is None:
+            return []
+        return [
+            (source, number)
+            for competition in self._competitions(wanted.competition)
+            for source, number in self.by_competition[competition]
+            if all(
+                part is None or part == found
+                for part, found in zip(wanted[1:], source[1:])
+            )
+        ]